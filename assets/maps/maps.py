@@ -0,0 +1,68 @@
+map1Layout = {
+    # Platforms that bob up and down
+    'vertical_positions' : [-300, -100, 100, 300],
+    'vertical_speed' : 150.0,
+
+    # Platforms that slide left and right
+    'horizontal_positions' : [-200, 0, 200],
+    'horizontal_y_positions' : [-150, 0, 150],
+    'horizontal_speed' : 120.0,
+    'horizontal_bounds' : [-350, 350],  # One [min, max] for all of them, or one per platform
+
+    # Keys sit on top of these platforms
+    'key_platform_indices' : [0, 3, 5],
+
+    # X positions for enemies
+    'enemy_positions' : [-250, 0, 250],
+    'enemy_speed' : 200.0,
+
+    # x min, x max, y min, y max of the world; the banks take bank_width off either x end
+    'world_extent' : [-500.0, 500.0, -500.0, 500.0],
+    'bank_width' : 100.0,
+
+    'player_start' : [-450.0, 0.0, 1.0]
+}
+
+map2Layout = {
+    # 8 leaf platforms, well-distributed across the screen
+    'leaf_positions' : [
+        [-350, 200],  # Top left
+        [-150, 300],  # Top
+        [150, 250],   # Top right
+        [-300, 0],    # Middle left
+        [0, 50],      # Middle
+        [300, 0],     # Middle right
+        [-200, -200], # Bottom left
+        [200, -250]   # Bottom right
+    ],
+
+    # Chosen for good distribution
+    'key_platform_indices' : [1, 4, 6],
+
+    'world_extent' : [-500.0, 500.0, -500.0, 500.0],
+    'bank_width' : 100.0,
+
+    'player_start' : [-450.0, 0.0, 1.0]
+}
+
+map1LongLayout = {
+    # Map 1 stretched to three screens wide: the camera scrolls and off-screen entities are culled
+    'vertical_positions' : [-300, -100, 100, 300, 500, 700, 900, 1100, 1300, 1500, 1700, 1900, 2100, 2300],
+    'vertical_speed' : 150.0,
+
+    'horizontal_positions' : [-200, 200, 600, 1000, 1400, 1800, 2200],
+    'horizontal_y_positions' : [-150, 0, 150, 0, -150, 0, 150],
+    'horizontal_speed' : 120.0,
+    'horizontal_bounds' : [[-350, -50], [50, 350], [450, 750], [850, 1150], [1250, 1550], [1650, 1950], [2050, 2350]],
+
+    # One key near each end and one in the middle
+    'key_platform_indices' : [0, 7, 13],
+
+    'enemy_positions' : [-250, 250, 750, 1250, 1750, 2250],
+    'enemy_speed' : 200.0,
+
+    'world_extent' : [-500.0, 2500.0, -500.0, 500.0],
+    'bank_width' : 100.0,
+
+    'player_start' : [-450.0, 0.0, 1.0]
+}
@@ -1,118 +1,92 @@
 import numpy as np
 
-def CreateCircle(center, radius, colour, points = 10, offset = 0, semi = False):
-    vertices = [center[0], center[1], center[2], colour[0], colour[1], colour[2]]
+# Interleaved vertex layout: x, y, z, r, g, b
+VERTEX_SIZE = 6
+
+def Vertices(positions, colour):
+    # (n, 3) positions and one colour (or one per vertex) -> flat float32 vertex array
+    positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+    vertices = np.empty((len(positions), VERTEX_SIZE), dtype=np.float32)
+    vertices[:, :3] = positions
+    vertices[:, 3:] = colour
+    return vertices.reshape(-1)
+
+def Fan(ring_size, offset=0):
+    # Indices of a closed triangle fan: vertex `offset` is the centre, the next ring_size vertices the rim
+    indices = np.full((ring_size, 3), offset, dtype=np.uint32)
+    indices[:, 1] += np.arange(1, ring_size + 1, dtype=np.uint32)
+    indices[:-1, 2] = indices[1:, 1]
+    indices[-1, 2] += 1
+    return indices.reshape(-1)
+
+def RadialFan(center, radii, angles, colour, offset=0):
+    # A centre vertex plus one rim vertex per angle, at the matching radius, joined into a fan
+    center = np.asarray(center, dtype=np.float64)
+    rim = np.empty((len(angles), 3))
+    rim[:, 0] = center[0] + radii * np.cos(angles)
+    rim[:, 1] = center[1] + radii * np.sin(angles)
+    rim[:, 2] = center[2]
+    return Vertices(np.concatenate([center[None], rim]), colour), Fan(len(angles), offset)
+
+def Merge(meshes):
+    # Concatenate (vertices, indices) pairs into one mesh, shifting each one's indices past the previous vertices
+    vertices = []
     indices = []
+    count = 0
+    for mesh_vertices, mesh_indices in meshes:
+        vertices.append(mesh_vertices)
+        indices.append(mesh_indices + np.uint32(count))
+        count += len(mesh_vertices) // VERTEX_SIZE
+    return np.concatenate(vertices), np.concatenate(indices)
+
+def Tessellation(points, detail):
+    # Scale a base point count by a detail level, keeping at least a triangle
+    return max(3, int(round(points * detail)))
 
+def CreateCircle(center, radius, colour, points = 10, offset = 0, semi = False):
+    # A semicircle spans angles 0..pi with points + 1 rim vertices, a full circle 0..2pi with points
     if semi == True:
-        for i in range(points+1):
-            vertices += [
-                center[0] + radius * np.cos(float(i * np.pi)/points),
-                center[1] + radius * np.sin(float(i * np.pi)/points),
-                center[2],
-                colour[0],
-                colour[1],
-                colour[2],
-                ]
-            
-            ind1 = i+1
-            ind2 = i+2 if i != points else 1
-            indices += [0 + offset, ind1 + offset, ind2 + offset]
+        angles = np.arange(points + 1) * np.pi / points
     else:
-        for i in range(points):
-            vertices += [
-                center[0] + radius * np.cos(float(i * 2* np.pi)/points),
-                center[1] + radius * np.sin(float(i * 2* np.pi)/points),
-                center[2],
-                colour[0],
-                colour[1],
-                colour[2],
-                ]
-            
-            ind1 = i+1
-            ind2 = i+2 if i != points-1 else 1
-            indices += [0 + offset, ind1 + offset, ind2 + offset]
-
-    return (vertices, indices)    
-
-def CreatePlayer():
-
-    vertices, indices = CreateCircle([0.0, 0.0, 0.0], 1.0, [220/255, 183/255, 139/255], 50, 0)
-
-    eye_verts1, eye_inds1 = CreateCircle([0.4, -0.5, 0.05], 0.3, [1,1,1], 20, len(vertices)/6)
-    vertices += eye_verts1
-    indices += eye_inds1
-
-    eye_verts2, eye_inds2 = CreateCircle([-0.4, -0.5, 0.05], 0.3, [1,1,1], 20, len(vertices)/6)
-    vertices += eye_verts2
-    indices += eye_inds2
-
-    eye_verts3, eye_inds3 = CreateCircle([-0.4, -0.5, 0.10], 0.12, [0,0,0], 10, len(vertices)/6)
-    vertices += eye_verts3
-    indices += eye_inds3
-
-    eye_verts4, eye_inds4 = CreateCircle([0.4, -0.5, 0.10], 0.12, [0,0,0], 10, len(vertices)/6)
-    vertices += eye_verts4
-    indices += eye_inds4
+        angles = np.arange(points) * 2 * np.pi / points
+    return RadialFan(center, radius, angles, colour, int(offset))
+
+def CreatePlayer(detail = 1.0):
+    # Face, eyes, pupils, hat and hat bobble; detail scales every part's point count
+    parts = [
+        ([0.0, 0.0, 0.0], 1.0, [220/255, 183/255, 139/255], 50, False),
+        ([0.4, -0.5, 0.05], 0.3, [1,1,1], 20, False),
+        ([-0.4, -0.5, 0.05], 0.3, [1,1,1], 20, False),
+        ([-0.4, -0.5, 0.10], 0.12, [0,0,0], 10, False),
+        ([0.4, -0.5, 0.10], 0.12, [0,0,0], 10, False),
+        ([0.0, 0.0, 0.2], 1.0, [1,0,0], 25, True),
+        ([0.0, 0.95, 0.3], 0.3, [0.9,0.9,0.9], 20, False),
+    ]
+    return Merge(CreateCircle(center, radius, colour, Tessellation(points, detail), semi=semi) for center, radius, colour, points, semi in parts)
 
-    eye_verts5, eye_inds5 = CreateCircle([0.0, 0.0, 0.2], 1.0, [1,0,0], 25, len(vertices)/6, True)
-    vertices += eye_verts5
-    indices += eye_inds5
+def BankedBackground(extent, bank_width, bankColour, waterColour):
+    # Grass banks bank_width wide down both x ends of the world, water in between
+    x_min, x_max, y_min, y_max = extent
+    strips = [(x_min, x_min + bank_width, bankColour), (x_max - bank_width, x_max, bankColour), (x_min + bank_width, x_max - bank_width, waterColour)]
 
-    eye_verts6, eye_inds6 = CreateCircle([0.0, 0.95, 0.3], 0.3, [0.9,0.9,0.9], 20, len(vertices)/6)
-    vertices += eye_verts6
-    indices += eye_inds6
+    vertices = []
+    indices = []
+    for i, (left, right, colour) in enumerate(strips):
+        for x, y in ((left, y_max), (right, y_max), (right, y_min), (left, y_min)):
+            vertices += [x, y, -0.9, colour[0], colour[1], colour[2]]
+        indices += [4 * i, 4 * i + 1, 4 * i + 2, 4 * i, 4 * i + 3, 4 * i + 2]
 
-    return vertices, indices
+    return np.array(vertices, dtype=np.float32), np.array(indices, dtype=np.uint32)
 
-def CreateBackground():
+def CreateBackground(x_min = -500.0, x_max = 500.0, y_min = -500.0, y_max = 500.0, bank_width = 100.0):
     grassColour = [0,1,0]
     waterColour = [0,0,1]
+    return BankedBackground((x_min, x_max, y_min, y_max), bank_width, grassColour, waterColour)
 
-    vertices = [
-        -500.0, 500.0, -0.9, grassColour[0], grassColour[1], grassColour[2],
-        -400.0, 500.0, -0.9, grassColour[0], grassColour[1], grassColour[2],
-        -400.0, -500.0, -0.9, grassColour[0], grassColour[1], grassColour[2],
-        -500.0, -500.0, -0.9, grassColour[0], grassColour[1], grassColour[2],
-
-        500.0, 500.0, -0.9, grassColour[0], grassColour[1], grassColour[2],
-        400.0, 500.0, -0.9, grassColour[0], grassColour[1], grassColour[2],
-        400.0, -500.0, -0.9, grassColour[0], grassColour[1], grassColour[2],
-        500.0, -500.0, -0.9, grassColour[0], grassColour[1], grassColour[2],
-
-        -400.0, 500.0, -0.9, waterColour[0], waterColour[1], waterColour[2],
-        400.0, 500.0, -0.9, waterColour[0], waterColour[1], waterColour[2],
-        400.0, -500.0, -0.9, waterColour[0], waterColour[1], waterColour[2],
-        -400.0, -500.0, -0.9, waterColour[0], waterColour[1], waterColour[2],
-    ]
-
-    indices = [
-        0,1,2, 0,3,2,
-        8,9,10, 8,11,10,
-        4,5,6, 4,7,6
-    ]
-
-    return vertices, indices
-
-def CreatePlatform():
-    # Create a circular platform
-    vertices = [0, 0, 0, 0.6, 0.3, 0.0]  # Center point, brown color
-    indices = []
-    
-    # Create circle points
-    points = 32  # More points for smoother circle
-    for i in range(points):
-        angle = 2 * np.pi * i / points
-        vertices.extend([
-            40 * np.cos(angle), 40 * np.sin(angle), 0,  # Position
-            0.6, 0.3, 0.0  # Color (brown)
-        ])
-        if i < points - 1:
-            indices.extend([0, i + 1, i + 2])
-        else:
-            indices.extend([0, points, 1])  # Close the circle
-    
-    return vertices, indices
+def CreatePlatform(points = 32):
+    # Create a circular, brown platform
+    angles = 2 * np.pi * np.arange(points) / points
+    return RadialFan([0, 0, 0], 40, angles, [0.6, 0.3, 0.0])
 
 def CreateKey():
     # Create a larger, brighter key
@@ -128,7 +102,7 @@ def CreateKey():
         0, 2, 3,  # Second triangle
     ]
     
-    return vertices, indices
+    return np.array(vertices, dtype=np.float32), np.array(indices, dtype=np.uint32)
 
 def CreateEnemy():
     # Create a red triangle for the enemy
@@ -140,58 +114,18 @@ def CreateEnemy():
     
     indices = [0, 1, 2]  # Single triangle
     
-    return vertices, indices
+    return np.array(vertices, dtype=np.float32), np.array(indices, dtype=np.uint32)
 
-def CreateJungleBackground():
+def CreateJungleBackground(x_min = -500.0, x_max = 500.0, y_min = -500.0, y_max = 500.0, bank_width = 100.0):
     jungleGreen = [0.0, 0.5, 0.0]  # Darker green for jungle
     waterColor = [0.4, 0.494, 0.173]   # #667E2C converted to RGB
+    return BankedBackground((x_min, x_max, y_min, y_max), bank_width, jungleGreen, waterColor)
 
-    vertices = [
-        -500.0, 500.0, -0.9, jungleGreen[0], jungleGreen[1], jungleGreen[2],
-        -400.0, 500.0, -0.9, jungleGreen[0], jungleGreen[1], jungleGreen[2],
-        -400.0, -500.0, -0.9, jungleGreen[0], jungleGreen[1], jungleGreen[2],
-        -500.0, -500.0, -0.9, jungleGreen[0], jungleGreen[1], jungleGreen[2],
-
-        500.0, 500.0, -0.9, jungleGreen[0], jungleGreen[1], jungleGreen[2],
-        400.0, 500.0, -0.9, jungleGreen[0], jungleGreen[1], jungleGreen[2],
-        400.0, -500.0, -0.9, jungleGreen[0], jungleGreen[1], jungleGreen[2],
-        500.0, -500.0, -0.9, jungleGreen[0], jungleGreen[1], jungleGreen[2],
-
-        -400.0, 500.0, -0.9, waterColor[0], waterColor[1], waterColor[2],
-        400.0, 500.0, -0.9, waterColor[0], waterColor[1], waterColor[2],
-        400.0, -500.0, -0.9, waterColor[0], waterColor[1], waterColor[2],
-        -400.0, -500.0, -0.9, waterColor[0], waterColor[1], waterColor[2],
-    ]
-
-    indices = [
-        0,1,2, 0,3,2,
-        8,9,10, 8,11,10,
-        4,5,6, 4,7,6
-    ]
-
-    return vertices, indices
-
-def CreateLeafPlatform():
-    # Create a leaf-shaped platform
-    vertices = [0, 0, 0, 0.0, 0.8, 0.0]  # Center point, bright green
-    indices = []
-    
-    # Create leaf shape with more points on one side
-    points = 24
-    for i in range(points):
-        angle = 2 * np.pi * i / points
-        # Modify radius to create leaf shape
-        radius = 40 * (1 + 0.3 * np.sin(3 * angle))
-        vertices.extend([
-            radius * np.cos(angle), radius * np.sin(angle), 0,  # Position
-            0.0, 0.8, 0.0  # Color (bright green)
-        ])
-        if i < points - 1:
-            indices.extend([0, i + 1, i + 2])
-        else:
-            indices.extend([0, points, 1])
-    
-    return vertices, indices
+def CreateLeafPlatform(points = 24):
+    # Create a bright green leaf-shaped platform: the radius swells three times around the rim
+    angles = 2 * np.pi * np.arange(points) / points
+    radii = 40 * (1 + 0.3 * np.sin(3 * angles))
+    return RadialFan([0, 0, 0], radii, angles, [0.0, 0.8, 0.0])
 
 playerVerts, playerInds = CreatePlayer()
 playerProps = {
@@ -30,4 +30,27 @@ object_shader = {
 
         '''
 
-}
\ No newline at end of file
+}
+
+instanced_object_shader = {
+    "vertex_shader" : '''
+        
+        #version 330 core
+        layout(location = 0) in vec3 vertexPosition;
+        layout(location = 1) in vec3 vertexColour;
+        layout(location = 2) in mat4 instanceMatrix; // Occupies locations 2-5, one column each
+
+        out vec3 fragmentColour;
+
+        uniform mat4 camMatrix;
+
+        void main() {
+            fragmentColour = vertexColour;
+            gl_Position = camMatrix * instanceMatrix * vec4(vertexPosition, 1.0);
+        }
+
+        ''',
+
+        "fragment_shader" : object_shader["fragment_shader"]
+
+}
@@ -0,0 +1,294 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+from assets.objects import objects
+from utils.entities import HORIZONTAL, VERTICAL, ResetTravel, MoverPositions
+from utils.inputs import KEY_D, KEY_W, KEY_E
+from utils.simulation import Simulation
+from utils.journal import Journal
+from utils.timestep import FixedTimestep
+from utils.transforms import ModelMatrices, Transform, UpdateTransforms
+from utils import savefile
+
+# Headless benchmarks for the simulation, collision, matrix and geometry hot paths and save/load.
+# Nothing here touches OpenGL: rendering is covered by the CPU work that feeds the draw calls.
+#
+#   python benchmark.py                         # run everything and print a table
+#   python benchmark.py --filter collisions     # only benchmarks whose name contains "collisions"
+#   python benchmark.py --save-baseline         # store the results as the baseline
+#   python benchmark.py --compare               # flag results slower than the baseline, exit 1 on regressions
+BENCHMARKS = []  # (name, counts, setup); setup(count) returns the function to time
+DEFAULT_BASELINE = "benchmark_baseline.json"
+SCRATCH = tempfile.TemporaryDirectory()
+
+def Benchmark(name, counts=(None,)):
+    # Register a benchmark setup function, run once per entity count
+    def Register(setup):
+        BENCHMARKS.append((name, counts, setup))
+        return setup
+    return Register
+
+def ScaledSimulation(map_number, count, seed=0):
+    # A simulation on map_number with `count` platforms, keys and enemies scattered over the level
+    rng = np.random.default_rng(seed)
+    sim = Simulation()
+    sim.NewGame(map_number)
+
+    def Positions(z):
+        positions = rng.uniform(-400, 400, (count, 3)).astype(np.float32)
+        positions[:, 2] = z
+        return positions
+
+    movement_type = np.where(rng.random(count) < 0.5, HORIZONTAL, VERTICAL)
+    platforms = {'position' : Positions(0.0), 'speed' : rng.uniform(80, 160, count), 'movement_type' : movement_type, 'bounds' : np.tile([-350.0, 350.0], (count, 1))}
+    if map_number == 2:
+        platforms.update(speed=np.zeros(count), phase_offset=rng.uniform(0, sim.leaf_toggle_interval, count))
+        platforms['base_y'] = platforms['position'][:, 1]
+    sim.platforms.SetFields(platforms)
+    sim.keys.SetFields({'position' : Positions(2.0), 'platform_index' : np.arange(count)})
+    if map_number == 1:
+        sim.enemies.SetFields({'position' : Positions(1.0), 'speed' : np.full(count, 200.0), 'bounds' : np.tile([-300.0, 300.0], (count, 1))})
+    ResetTravel(sim.platforms, sim.time)
+    ResetTravel(sim.enemies, sim.time)
+    sim.platform_grid.Rebuild(sim.platforms.position)
+    sim.key_grid.Rebuild(sim.keys.position)
+    sim.enemy_grid.Rebuild(sim.enemies.position)
+    sim.player_position = np.array([0.0, 0.0, 0.0], dtype=np.float32)
+    sim.player_lives = 10 ** 9  # Never run out of lives mid-benchmark
+    return sim
+
+@Benchmark("update_scene/map1", counts=(10, 100, 1000, 10000))
+def UpdateSceneMap1(count):
+    # One 60 Hz frame of Game.UpdateScene's fixed-step loop
+    sim = ScaledSimulation(1, count)
+    timestep = FixedTimestep(tick_rate=120, max_steps=8)
+    def Run():
+        for _ in range(timestep.Advance(1 / 60)):
+            sim.Step(KEY_D | KEY_W, timestep.dt)
+    return Run
+
+@Benchmark("update_scene/map2", counts=(10, 100, 1000, 10000))
+def UpdateSceneMap2(count):
+    sim = ScaledSimulation(2, count)
+    timestep = FixedTimestep(tick_rate=120, max_steps=8)
+    inputs = [KEY_E, 0]
+    def Run():
+        for _ in range(timestep.Advance(1 / 60)):
+            inputs.reverse()  # Tap E every other tick
+            sim.Step(inputs[0], timestep.dt)
+    return Run
+
+@Benchmark("collisions", counts=(10, 100, 1000, 10000, 100000))
+def Collisions(count):
+    sim = ScaledSimulation(1, count)
+    return lambda: sim.CheckCollisions(1 / 120)
+
+@Benchmark("find_closest_leaf", counts=(8, 100, 1000, 10000, 100000))
+def FindClosestLeaf(count):
+    sim = ScaledSimulation(2, count)
+    return sim.FindClosestLeaf
+
+@Benchmark("mover_positions", counts=(100, 10000, 100000))
+def EvaluateMovers(count):
+    # Every platform's position at an arbitrary time, as a replay seek or a render would ask for it
+    sim = ScaledSimulation(1, count)
+    return lambda: MoverPositions(sim.platforms, 1234.5)
+
+@Benchmark("model_matrices", counts=(1, 100, 10000, 100000))
+def BuildModelMatrices(count):
+    positions = np.random.default_rng(0).uniform(-500, 500, (count, 3)).astype(np.float32)
+    return lambda: ModelMatrices(positions)
+
+@Benchmark("transform_matrix", counts=(1, 100, 1000))
+def BuildTransformMatrices(count):
+    # Object.Draw's matrix: every transform moved, then rebuilt in one batch
+    transforms = [Transform([0.0, 0.0, 0.0], 0.0, [1.0, 1.0, 1.0]) for _ in range(count)]
+    offset = [0.0]
+    def Run():
+        offset[0] += 1.0
+        for transform in transforms:
+            transform.position = [offset[0], 0.0, 0.0]
+        UpdateTransforms(transforms)
+    return Run
+
+@Benchmark("geometry/circle", counts=(10, 100, 1000, 10000))
+def CircleGeometry(count):
+    return lambda: objects.CreateCircle([0.0, 0.0, 0.0], 1.0, [1.0, 1.0, 1.0], count)
+
+for builder in ("CreatePlayer", "CreateBackground", "CreatePlatform", "CreateKey", "CreateEnemy", "CreateJungleBackground", "CreateLeafPlatform"):
+    Benchmark(f"geometry/{builder}")(lambda count, builder=builder: getattr(objects, builder))
+
+# The save benchmarks use SaveWriter's defaults, which is how the game saves
+
+@Benchmark("save/full", counts=(100, 10000, 100000))
+def SaveFull(count):
+    writer = savefile.SaveWriter(os.path.join(SCRATCH.name, "full.sav"))
+    state = ScaledSimulation(1, count).GetState(share=True)
+    def Run():
+        writer.Reset()
+        writer.Save(state)
+    return Run
+
+@Benchmark("save/full_compressed", counts=(100, 10000, 100000))
+def SaveFullCompressed(count):
+    # The opt-in compressed format, for comparison
+    writer = savefile.SaveWriter(os.path.join(SCRATCH.name, "compressed.sav"), compress=True)
+    state = ScaledSimulation(1, count).GetState(share=True)
+    def Run():
+        writer.Reset()
+        writer.Save(state)
+    return Run
+
+@Benchmark("save/delta", counts=(100, 10000, 100000))
+def SaveDelta(count):
+    # A save one tick after the last: the scalars and moving entities changed, the rest is skipped.
+    # Alternates between two prepared states so the tick itself isn't timed. Shared tables are kept
+    # as they are, as the game passes them; the live arrays are copied so the tick can't change them.
+    writer = savefile.SaveWriter(os.path.join(SCRATCH.name, "delta.sav"))
+    sim = ScaledSimulation(1, count)
+    def State():
+        return {name : array if not array.flags.writeable else np.array(array) for name, array in sim.GetState(share=True).items()}
+    states = [State()]
+    sim.Step(KEY_D, 1 / 120)
+    states.append(State())
+    writer.Save(states[0])
+    def Run():
+        states.reverse()
+        writer.Save(states[0])
+    return Run
+
+@Benchmark("load", counts=(100, 10000, 100000))
+def Load(count):
+    path = os.path.join(SCRATCH.name, f"load{count}.sav")
+    savefile.SaveWriter(path).Save(ScaledSimulation(1, count).GetState())
+    return lambda: savefile.Load(path)
+
+@Benchmark("journal/seek", counts=(10, 1000, 10000))
+def JournalSeek(count):
+    # Rebuild the tick just before the next snapshot, the farthest a seek has to step
+    sim = ScaledSimulation(1, count)
+    journal = Journal(sim)
+    for _ in range(2 * journal.snapshot_interval):
+        sim.Step(KEY_D | KEY_W, 1 / 120)
+        journal.Record(sim, KEY_D | KEY_W, 1 / 120)
+    target = Simulation()
+    return lambda: journal.Reconstruct(2 * journal.snapshot_interval - 1, target)
+
+@Benchmark("snapshot/capture", counts=(10, 10000, 100000))
+def SnapshotCapture(count):
+    # Nothing is copied but the player position, so this shouldn't grow with the entity count
+    sim = ScaledSimulation(1, count)
+    return sim.Capture
+
+@Benchmark("snapshot/restore", counts=(10, 10000, 100000))
+def SnapshotRestore(count):
+    sim = ScaledSimulation(1, count)
+    snapshot = sim.Capture()
+    return lambda: sim.Restore(snapshot)
+
+def TimeFunction(function, repeats, min_time):
+    # Seconds per call for each of `repeats` runs. Each run loops the function enough times to
+    # take at least min_time, so timer resolution doesn't matter for fast functions.
+    function()  # Warm up
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    samples = [elapsed / number]
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        samples.append((time.perf_counter() - start) / number)
+    return np.array(samples)
+
+def Statistics(samples):
+    q1, median, q3 = np.percentile(samples, [25, 50, 75])
+    return {
+        'min' : float(samples.min()),
+        'median' : float(median),
+        'mean' : float(samples.mean()),
+        'stdev' : float(samples.std(ddof=1)) if len(samples) > 1 else 0.0,
+        'iqr' : float(q3 - q1),
+    }
+
+def Run(name_filter=None, repeats=7, min_time=0.05):
+    # {benchmark id : statistics}, with ids like "collisions[1000]"
+    results = {}
+    for name, counts, setup in BENCHMARKS:
+        if name_filter and name_filter not in name:
+            continue
+        for count in counts:
+            key = name if count is None else f"{name}[{count}]"
+            results[key] = Statistics(TimeFunction(setup(count), repeats, min_time))
+            print(f"{key:<40}{FormatTime(results[key]['median']):>12}", file=sys.stderr)
+    return results
+
+def Compare(results, baseline, threshold):
+    # {benchmark id : median / baseline median} for every benchmark slower than the threshold allows
+    regressions = {}
+    for key, stats in results.items():
+        if key in baseline and stats['median'] > baseline[key]['median'] * (1 + threshold):
+            regressions[key] = stats['median'] / baseline[key]['median']
+    return regressions
+
+def FormatTime(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3f} {unit}"
+    return f"{seconds / 1e-9:.1f} ns"
+
+def PrintTable(results, baseline=None):
+    print(f"{'benchmark':<40}{'median':>12}{'min':>12}{'stdev':>12}{'vs baseline':>14}")
+    for key, stats in results.items():
+        change = ""
+        if baseline and key in baseline:
+            change = f"{stats['median'] / baseline[key]['median'] - 1:+.1%}"
+        print(f"{key:<40}{FormatTime(stats['median']):>12}{FormatTime(stats['min']):>12}{FormatTime(stats['stdev']):>12}{change:>14}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the game's hot paths without a GPU")
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--repeats", type=int, default=7, help="Timed runs per benchmark")
+    parser.add_argument("--min-time", type=float, default=0.05, help="Minimum seconds per timed run")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results in the baseline file")
+    parser.add_argument("--compare", action="store_true", help="Exit 1 if any benchmark regressed past the threshold")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown before a result counts as a regression")
+    parser.add_argument("--output", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+
+    results = Run(args.filter, args.repeats, args.min_time)
+    PrintTable(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        # Keep the baseline entries of benchmarks that weren't run this time
+        merged = dict(baseline or {}, **results)
+        with open(args.baseline, 'w') as f:
+            json.dump(merged, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+    if args.compare:
+        if baseline is None:
+            sys.exit(f"No baseline at {args.baseline}, run with --save-baseline first")
+        regressions = Compare(results, baseline, args.threshold)
+        for key, ratio in regressions.items():
+            print(f"REGRESSION  {key}: {ratio:.2f}x the baseline median")
+        sys.exit(1 if regressions else 0)
@@ -1,13 +1,24 @@
 import imgui
 import numpy as np
-from utils.graphics import Object, Camera, Shader
-from assets.shaders.shaders import object_shader
-from assets.objects.objects import playerProps, backgroundProps, platformProps, keyProps, enemyProps, CreateJungleBackground, CreateLeafPlatform
+from utils.graphics import Camera, Shader, MeshCache, Scene, StreamBuffer, StaticBatch, ModelMatrices, UpdateTransforms
+from utils.meshstore import MESH_CACHE_DIRECTORY
+from utils.simulation import Simulation
+from utils.entities import MoverPositions
+from utils.timestep import FixedTimestep, Interpolate
+from utils import savefile
+from utils.inputs import KEY_1, KEY_F
+from utils.recording import Recorder
+from utils.journal import Journal
+from utils.events import KEY_COLLECTED
+from utils.profiler import PROFILER
+from assets.shaders.shaders import object_shader, instanced_object_shader
+from assets.objects.objects import playerProps, backgroundProps, CreatePlayer, CreateBackground, CreateJungleBackground, CreatePlatform, CreateLeafPlatform, CreateKey, CreateEnemy
 import glfw
-import copy
 from OpenGL.GL import *
 import json
 import os
+import sys
+from datetime import datetime
 
 class Game:
     def __init__(self, height, width):
@@ -16,183 +27,108 @@ class Game:
         self.screen = -1  # -1: uninitialized, 0: menu, 1: game, 2: victory screen, 3: game over screen
         self.camera = Camera(height, width)
         self.shader = Shader(object_shader['vertex_shader'], object_shader['fragment_shader'])
+        self.instanced_shader = Shader(instanced_object_shader['vertex_shader'], instanced_object_shader['fragment_shader'])
         self.objects = []
-        # Add player stats
-        self.player_health = 100
-        self.player_lives = 3
+        # Shared geometry, cached by builder so map switches and restarts reuse the uploaded buffers.
+        # Built arrays are also kept on disk, so later runs skip the builders.
+        self.meshes = MeshCache(directory=MESH_CACHE_DIRECTORY)
+        # GPU resources of the current map, released as a whole when the scene is rebuilt
+        self.scene = Scene(self.meshes)
+        # All gameplay state lives in the simulation, the game only draws it
+        self.sim = Simulation()
+        # Physics runs in fixed ticks; rendering blends the last two ticks
+        self.timestep = FixedTimestep(tick_rate=120, max_steps=8)
+        self.previous_state = None
         # Add map and time tracking
         self.current_map = 1
         self.start_time = None
         self.elapsed_time = 0
-        # Add player movement properties
-        self.player_speed = 500.0  # Increased speed to account for scaling
-        self.player_position = np.array([-0.8, 0.0, 0.0], dtype=np.float32)  # Starting position
-        self.platforms = []  # List to store platform objects
-        self.keys_collected = 0
-        self.keys = []  # List to store key objects
-        self.player_velocity_z = 0  # Changed from y to z
-        self.jump_speed = 400.0
-        self.gravity = 800.0
-        self.is_grounded = False
         self.paused = False  # Add pause state
-        self.save_file = "savegame.txt"
-        self.enemies = []
-        self.drowning_timer = 0
-        self.is_drowning = False
-        self.normal_speed = 500.0
-        self.water_speed = 250.0
-        self.max_oxygen = 2.0  # 2 seconds of oxygen
-        self.oxygen_level = self.max_oxygen
-        self.oxygen_regen_rate = 0.5  # Regenerate 0.5 oxygen per second
-        self.vine_active = False
-        self.vine_start = None
-        self.vine_end = None
-        self.vine_timer = 0
-        self.vine_duration = 0.2  # Duration of vine animation in seconds
-        self.leaf_toggle_interval = 2.0  # seconds between active/inactive states
-        # Add vine line object
-        vine_vertices = np.array([0, 0, 0, 0, 0.5, 0,  # Start point (brown color)
-                                0, 0, 0, 0, 0.5, 0], dtype=np.float32)  # End point
-        vine_indices = np.array([0, 1], dtype=np.uint32)
-        
-        self.vine_object = Object(self.shader, {
-            'vertices': vine_vertices,
-            'indices': vine_indices,
-            'position': np.array([0, 0, 0], dtype=np.float32),
-            'rotation_z': 0,
-            'scale': np.array([1, 1, 1], dtype=np.float32)
-        })
+        self.save_file = "savegame.sav"
+        self.legacy_save_file = "savegame.txt"
+        self.save_writer = savefile.SaveWriter(self.save_file)  # Uncompressed: zlib costs several frames at 100k entities
+        # Input recording and replay
+        self.record_directory = None  # When set, every new game is recorded into this directory
+        self.recorder = None
+        self.replay = None  # Iterator of recorded (mask, dt) ticks driving the simulation instead of the keyboard
+        self.replay_speed = 1.0
+        # Snapshots and per-tick deltas of the running session, for rollback, seeking and telemetry
+        self.journal = None
+        self.frame_events = []  # Events the ticks of the current frame emitted
+        # Per-frame dynamic geometry such as the vine, drawn from one streaming buffer
+        self.stream = StreamBuffer()
+        # Geometry that rarely moves (background, keys, leaves) merged into a single draw
+        self.batch = StaticBatch(self.shader)
+        self.batch_matrices = {}  # Batch group -> model matrix of every instance, refreshed only while on screen
 
     def InitScreen(self, lives=3, health=100, keys_collected=0, elapsed_time=0):
-        if self.screen == 1:
-            self.start_time = glfw.get_time()
-            self.keys_collected = 0
-            
-            # Initialize objects list with background and player in correct order
-            self.objects = [
-                Object(self.shader, backgroundProps),  # Index 0: background
-                Object(self.shader, playerProps)       # Index 1: player
-            ]
-            
-            # Clear existing platforms and keys
-            self.platforms = []
-            self.keys = []
-            
-            # Create platforms after player
-            vertical_positions = [-300, -100, 100, 300]
-            for x_pos in vertical_positions:
-                platform_props = copy.deepcopy(platformProps)
-                platform_props['position'] = np.array([x_pos, 0, 0], dtype=np.float32)
-                platform_props['movement_type'] = 'vertical'
-                platform_props['speed'] = 150.0
-                platform = Object(self.shader, platform_props)
-                self.platforms.append(platform)
-                self.objects.append(platform)  # Added after player
-
-            horizontal_positions = [-200, 0, 200]
-            y_positions = [-150, 0, 150]
-            for x_pos, y_pos in zip(horizontal_positions, y_positions):
-                platform_props = copy.deepcopy(platformProps)
-                platform_props['position'] = np.array([x_pos, y_pos, 0], dtype=np.float32)
-                platform_props['movement_type'] = 'horizontal'
-                platform_props['speed'] = 120.0
-                platform_props['bounds'] = [-350, 350]
-                platform = Object(self.shader, platform_props)
-                self.platforms.append(platform)
-                self.objects.append(platform)
-            
-            # Create keys last
-            key_platform_indices = [0, 3, 5]
-            for i in key_platform_indices:
-                platform_pos = self.platforms[i].properties['position']
-                key_props = copy.deepcopy(keyProps)
-                key_props['position'] = np.array([
-                    platform_pos[0], 
-                    platform_pos[1] + 15,
-                    2.0
-                ], dtype=np.float32)
-                key_props['platform_index'] = i
-                key = Object(self.shader, key_props)
-                self.keys.append(key)
-                self.objects.append(key)
-
-            # Set initial player position
-            self.player_position = np.array([-450.0, 0.0, 1.0], dtype=np.float32)
-            self.objects[1].properties['position'] = self.player_position
-
-            # Create enemies after platforms
-            enemy_positions = [-250, 0, 250]  # X positions for enemies
-            for x_pos in enemy_positions:
-                enemy_props = copy.deepcopy(enemyProps)
-                enemy_props['position'] = np.array([x_pos, 0, 1.0], dtype=np.float32)
-                enemy = Object(self.shader, enemy_props)
-                self.enemies.append(enemy)
-                self.objects.append(enemy)
-
-        elif self.screen == 4:  # New jungle map
+        if self.screen == 1 or self.screen == 4:
             self.start_time = glfw.get_time()
-            self.keys_collected = 0
-            
-            # Initialize objects list with jungle background and player
-            jungle_background = copy.deepcopy(backgroundProps)
-            jungle_verts, jungle_inds = CreateJungleBackground()
-            jungle_background['vertices'] = np.array(jungle_verts, dtype=np.float32)
-            jungle_background['indices'] = np.array(jungle_inds, dtype=np.uint32)
-            
-            self.objects = [
-                Object(self.shader, jungle_background),
-                Object(self.shader, playerProps)
-            ]
-            
-            # Clear existing platforms and keys
-            self.platforms = []
-            self.keys = []
-            
-            # Create 8 leaf platforms in random positions
-            # But ensure they're well-distributed across the screen
-            leaf_positions = [
-                [-350, 200],  # Top left
-                [-150, 300],  # Top
-                [150, 250],   # Top right
-                [-300, 0],    # Middle left
-                [0, 50],      # Middle
-                [300, 0],     # Middle right
-                [-200, -200], # Bottom left
-                [200, -250]   # Bottom right
-            ]
-            
-            # Select 3 random indices for key platforms in advance
-            key_platform_indices = [1, 4, 6]  # Chosen for good distribution
-            
-            for i, pos in enumerate(leaf_positions):
-                leaf_props = copy.deepcopy(platformProps)
-                leaf_verts, leaf_inds = CreateLeafPlatform()
-                leaf_props['vertices'] = np.array(leaf_verts, dtype=np.float32)
-                leaf_props['indices'] = np.array(leaf_inds, dtype=np.uint32)
-                leaf_props['position'] = np.array([pos[0], pos[1], 0], dtype=np.float32)
-                leaf_props['is_active'] = True
-                leaf_props['phase_offset'] = (i * self.leaf_toggle_interval) / len(leaf_positions)
-                leaf_props['speed'] = 0.0  # Set speed to 0 to prevent movement
-                
-                platform = Object(self.shader, leaf_props)
-                self.platforms.append(platform)
-                self.objects.append(platform)
-                
-                # If this platform is selected for a key, create the key
-                if i in key_platform_indices:
-                    key_props = copy.deepcopy(keyProps)
-                    key_props['position'] = np.array([
-                        pos[0],  # Same x as platform
-                        pos[1] + 15,  # Slightly above platform
-                        2.0  # In front of platform
-                    ], dtype=np.float32)
-                    key = Object(self.shader, key_props)
-                    self.keys.append(key)
-                    self.objects.append(key)
-            
-            # Set initial player position
-            self.player_position = np.array([-450.0, 0.0, 1.0], dtype=np.float32)
-            self.objects[1].properties['position'] = self.player_position
+            self.elapsed_time = elapsed_time
+            self.current_map = 1 if self.screen == 1 else 2
+            self.StopReplay()
+            self.sim.NewGame(self.current_map, lives, health)
+            self.timestep.Reset()
+            self.previous_state = None
+            self.journal = Journal(self.sim)
+            self.StartRecording(lives, health)
+            self.BuildSceneObjects()
+
+    def StartRecording(self, lives, health):
+        self.StopRecording()
+        if self.record_directory is not None:
+            os.makedirs(self.record_directory, exist_ok=True)
+            path = os.path.join(self.record_directory, datetime.now().strftime("session-%Y%m%d-%H%M%S.rec"))
+            self.recorder = Recorder(path, self.current_map, lives, health)
+
+    def StopRecording(self):
+        if self.recorder is not None:
+            self.recorder.Close(self.sim)
+            print(f"Recorded {self.recorder.ticks} ticks to {self.recorder.path}")
+            self.recorder = None
+
+    def StartReplay(self, recording, speed=1.0):
+        # Play a recording back on screen. speed scales how many recorded ticks run per real second.
+        self.StopRecording()
+        self.current_map = recording.map_number
+        self.screen = 1 if recording.map_number == 1 else 4
+        self.start_time = glfw.get_time()
+        self.elapsed_time = 0
+        self.sim.NewGame(recording.map_number, recording.lives, recording.health)
+        self.replay = recording.Ticks()
+        self.journal = Journal(self.sim)
+        self.replay_speed = speed
+        # Catch up however far behind the replay gets instead of dropping ticks
+        self.timestep = FixedTimestep(tick_rate=120, max_steps=sys.maxsize)
+        self.previous_state = None
+        self.BuildSceneObjects()
+
+    def BuildSceneObjects(self):
+        # Create render objects for the unique parts of the scene. Platforms, keys and enemies
+        # are drawn straight from the simulation's entity arrays with shared meshes.
+        # The previous scene's meshes are released first; ones the new scene uses again are kept.
+        previous_scene = self.scene
+        self.scene = Scene(self.meshes)
+
+        self.objects = [
+            self.scene.Object(self.shader, playerProps, CreatePlayer)  # Index 0: player
+        ]
+        previous_scene.Teardown()
+
+        # The background never moves, so it only goes into the static batch once per map
+        self.batch.Clear()
+        self.batch_matrices = {}
+        background = CreateBackground if self.current_map == 1 else CreateJungleBackground
+        self.batch.Set('background', *self.meshes.store.Get(background, *self.sim.world_extent.tolist(), self.sim.bank_width), ModelMatrices(backgroundProps['position'], backgroundProps['rotation_z'], backgroundProps['scale']))
+
+        self.SyncObjects()
+
+    def SyncObjects(self):
+        # Copy simulation state into the player object
+        player = self.objects[0].transform
+        player.position = self.RenderPosition('player', self.sim.player_position)
+        scale_factor = 20.0 + ((player.position[2] / 100.0) * 5)
+        player.scale = np.array([scale_factor, scale_factor, 1.0], dtype=np.float32)
 
     def ProcessFrame(self, inputs, time):
         if self.screen == -1:
@@ -200,14 +136,17 @@ class Game:
         
         # Handle menu inputs
         if self.screen == 0:
-            if "1" in inputs:  # New Game
+            if inputs.pressed & KEY_1:  # New Game
                 self.screen = 1
                 self.InitScreen()
         
-        self.DrawText()
+        with PROFILER.Scope("DrawText"):
+            self.DrawText()
         if self.screen == 1 or self.screen == 4:  # Only update and draw scene in game mode
-            self.UpdateScene(inputs, time)
-            self.DrawScene()
+            with PROFILER.Scope("UpdateScene"):
+                self.UpdateScene(inputs, time)
+            with PROFILER.Scope("DrawScene"):
+                self.DrawScene()
 
     def DrawText(self):
         if self.screen == 0:  # Menu Screen
@@ -265,9 +204,6 @@ class Game:
             imgui.set_cursor_pos_x((window_width - button_width) * 0.5)
             if imgui.button("New Game", width=button_width, height=button_height):
                 self.screen = 1
-                self.player_lives = 3
-                self.player_health = 100
-                self.keys_collected = 0
                 self.elapsed_time = 0
                 self.start_time = glfw.get_time()
                 self.InitScreen()
@@ -430,9 +366,6 @@ class Game:
             if imgui.button("Try Again", width=button_width, height=button_height):
                 self.screen = 1
                 # Reset all game parameters
-                self.player_lives = 3
-                self.player_health = 100
-                self.keys_collected = 0
                 self.elapsed_time = 0
                 self.start_time = glfw.get_time()
                 self.InitScreen()
@@ -444,9 +377,6 @@ class Game:
             if imgui.button("Main Menu", width=button_width, height=button_height):
                 self.screen = 0
                 # Reset all game parameters
-                self.player_lives = 3
-                self.player_health = 100
-                self.keys_collected = 0
                 self.elapsed_time = 0
             
             imgui.dummy(0, 10)
@@ -472,7 +402,7 @@ class Game:
             pos = imgui.get_window_position()
             
             # Top row: Lives, Map, Time
-            imgui.text(f"Lives: {self.player_lives}")
+            imgui.text(f"Lives: {self.sim.player_lives}")
             
             # Map (centered)
             map_text = f"Map: {self.current_map}"
@@ -494,7 +424,7 @@ class Game:
                 imgui.get_color_u32_rgba(1, 0, 0, 1)
             )
             
-            health_fill = (self.player_health / 100) * 200
+            health_fill = (self.sim.player_health / 100) * 200
             draw_list.add_rect_filled(
                 pos[0] + 10, pos[1] + 30,
                 pos[0] + 10 + health_fill, pos[1] + 50,
@@ -502,7 +432,7 @@ class Game:
             )
             
             imgui.set_cursor_pos((220, 30))
-            imgui.text(f"{int(self.player_health)}/100")
+            imgui.text(f"{int(self.sim.player_health)}/100")
             
             # Oxygen bar
             draw_list.add_rect_filled(
@@ -511,7 +441,7 @@ class Game:
                 imgui.get_color_u32_rgba(0.1, 0.1, 0.5, 1)
             )
             
-            oxygen_fill = (self.oxygen_level / self.max_oxygen) * 200
+            oxygen_fill = (self.sim.oxygen_level / self.sim.max_oxygen) * 200
             draw_list.add_rect_filled(
                 pos[0] + 10, pos[1] + 60,
                 pos[0] + 10 + oxygen_fill, pos[1] + 80,
@@ -523,7 +453,7 @@ class Game:
             
             # Keys
             imgui.set_cursor_pos((10, 90))
-            imgui.text(f"Keys: {self.keys_collected}/3")
+            imgui.text(f"Keys: {self.sim.keys_collected}/3")
             
             imgui.end()
 
@@ -596,6 +526,8 @@ class Game:
                 if imgui.button("Main Menu", width=button_width, height=button_height):
                     self.screen = 0
                     self.paused = False
+                    self.StopRecording()
+                    self.StopReplay()
                 
                 imgui.dummy(0, 10)
                 
@@ -611,343 +543,179 @@ class Game:
 
     def UpdateScene(self, inputs, time):
         if self.screen == 1 or self.screen == 4:
-            if "F" in inputs and self.paused == False:
-                self.paused = True
-                return  # Skip updates when newly paused
+            if inputs.pressed & KEY_F:
+                self.paused = not self.paused
+                if self.paused:
+                    return  # Skip updates when newly paused
             
             # Skip game updates if paused
             if self.paused:
                 return
 
-            # Update enemy positions
-            for enemy in self.enemies:
-                pos = enemy.properties['position']
-                speed = enemy.properties['speed']
-                direction = enemy.properties['direction']
-                bounds = enemy.properties['bounds']
-                
-                # Update Y position
-                new_y = pos[1] + speed * direction * time["deltaTime"]
-                # Check bounds and reverse direction if needed
-                if new_y > bounds[1] or new_y < bounds[0]:
-                    enemy.properties['direction'] *= -1
-                else:
-                    enemy.properties['position'][1] = new_y
-
-            # Update platform positions first
-            for platform in self.platforms:
-                pos = platform.properties['position']
-                speed = platform.properties['speed']
-                direction = platform.properties['direction']
-                bounds = platform.properties['bounds']
-                movement_type = platform.properties['movement_type']
-                
-                if movement_type == 'vertical':
-                    new_y = pos[1] + speed * direction * time["deltaTime"]
-                    if new_y > bounds[1] or new_y < bounds[0]:
-                        platform.properties['direction'] *= -1
-                    else:
-                        platform.properties['position'][1] = new_y
-                else:  # horizontal movement
-                    new_x = pos[0] + speed * direction * time["deltaTime"]
-                    if new_x > bounds[1] or new_x < bounds[0]:
-                        platform.properties['direction'] *= -1
-                    else:
-                        platform.properties['position'][0] = new_x
-
-            # Player movement
-            move_x = 0.0
-            move_y = 0.0  # Added back Y movement
-            
-            if "A" in inputs:
-                move_x -= self.player_speed
-            if "D" in inputs:
-                move_x += self.player_speed
-            if "W" in inputs:  # Added back W movement
-                move_y += self.player_speed
-            if "S" in inputs:  # Added back S movement
-                move_y -= self.player_speed
-            
-            # Jump with spacebar when grounded
-            if "SPACE" in inputs and self.is_grounded and self.screen == 1:
-                self.player_velocity_z = self.jump_speed
-                self.is_grounded = False
-            
-            # Only apply gravity if player is above ground level
-            if self.player_position[2] > 0 or self.player_velocity_z > 0:
-                self.player_velocity_z -= self.gravity * time["deltaTime"]
+            self.frame_events = []
+            if self.replay is not None:
+                self.StepReplay(time)
             else:
-                self.player_position[2] = 0
-                self.player_velocity_z = 0
-                self.is_grounded = True
-            
-            # Update position
-            self.player_position[0] += move_x * time["deltaTime"]
-            self.player_position[1] += move_y * time["deltaTime"]  # Added Y position update
-            self.player_position[2] += self.player_velocity_z * time["deltaTime"]
-            
-            # Adjusted scale calculation
-            base_scale = 20.0
-            scale_factor = base_scale + ((self.player_position[2] / 100.0) * 5)
-            
-            # Update player object position and scale
-            self.objects[1].properties['position'] = np.array([
-                self.player_position[0],
-                self.player_position[1],
-                self.player_position[2]
-            ], dtype=np.float32)
-            
-            self.objects[1].properties['scale'] = np.array([
-                scale_factor,
-                scale_factor,
-                1.0
-            ], dtype=np.float32)
-
-            self.check_collisions(time["deltaTime"])
-
-            # Vine swinging mechanic (only in map 2)
-            if self.screen == 4 or self.current_map == 2:
-                if "E" in inputs and not self.vine_active:
-                    closest_leaf, dist = self.find_closest_leaf()
-                    print(closest_leaf, dist)
-                    if closest_leaf and dist < 500:  # Maximum vine range
-                        self.vine_active = True
-                        self.vine_start = self.player_position.copy()
-                        self.vine_end = closest_leaf.properties['position'].copy()
-                        self.vine_timer = 0
-                        # Immediately move player to leaf center
-                        self.player_position = closest_leaf.properties['position'].copy()
-                        self.player_velocity_z = 0
-                        self.is_grounded = True
-                
-                # Update vine animation
-                if self.vine_active:
-                    self.vine_timer += time["deltaTime"]
-                    if self.vine_timer >= self.vine_duration:
-                        self.vine_active = False
-
-            # Update leaf states in map 2
-            if self.screen == 4:
-                current_time = glfw.get_time()  # Use GLFW's time directly
-                
-                # Update each leaf's state
-                for platform in self.platforms:
-                    phase = current_time + platform.properties['phase_offset']
-                    # Toggle active state every leaf_toggle_interval seconds
-                    is_active = (phase % (2.0 * self.leaf_toggle_interval)) < self.leaf_toggle_interval
-                    platform.properties['is_active'] = is_active
-                    
-                    # Get the base position (original y position)
-                    base_y = platform.properties.get('base_y', platform.properties['position'][1])
-                    if 'base_y' not in platform.properties:
-                        platform.properties['base_y'] = base_y  # Store original y position
-                    
-                    # Update y position based on active state
-                    if is_active:
-                        platform.properties['position'][1] = base_y + 20  # Raise when active
-                    else:
-                        platform.properties['position'][1] = base_y  # Return to original position when inactive
+                for _ in range(self.timestep.Advance(time["deltaTime"])):
+                    self.previous_state = self.CaptureRenderState()
+                    with PROFILER.Scope("Step"):
+                        self.sim.Step(inputs.held, self.timestep.dt)
+                    self.frame_events += self.journal.Record(self.sim, inputs.held, self.timestep.dt)
+                    if self.recorder is not None:
+                        self.recorder.Record(inputs.held, self.timestep.dt)
+            kinds = [kind for _, kind, _ in self.frame_events]
+            if KEY_COLLECTED in kinds:
+                print(f"Key collected! Total: {self.sim.keys_collected}/3")
+
+            if self.screen == 1 and self.sim.screen == 4:
+                # Simulation advanced to map 2, rebuild the render objects
+                self.screen = 4
+                self.current_map = 2
+                self.previous_state = None
+                self.BuildSceneObjects()
+            elif self.sim.screen == 2:
+                print("Victory!")
+                self.screen = 2
+                self.StopRecording()
+            elif self.sim.screen == 3:
+                self.screen = 3  # Game Over
+                self.StopRecording()
+
+            self.SyncObjects()
+
+    def StopReplay(self):
+        if self.replay is not None:
+            self.replay = None
+            self.timestep = FixedTimestep(tick_rate=120, max_steps=8)
+
+    def StepReplay(self, time):
+        for _ in range(self.timestep.Advance(time["deltaTime"] * self.replay_speed)):
+            tick = next(self.replay, None)
+            if tick is None:
+                print("Replay finished")
+                self.StopReplay()
+                return
+            mask, dt = tick
+            self.previous_state = self.CaptureRenderState()
+            with PROFILER.Scope("Step"):
+                self.sim.Step(mask, dt)
+            self.frame_events += self.journal.Record(self.sim, mask, dt)
+
+    def CaptureRenderState(self):
+        # Player position kept from the previous tick for interpolation. Platforms and enemies
+        # don't need it, they're evaluated on their trajectories at the frame's exact time.
+        return {
+            'player': self.sim.player_position.copy()
+        }
+
+    def RenderPosition(self, name, current):
+        if self.previous_state is None:
+            return current
+        return Interpolate(self.previous_state[name], current, self.timestep.Alpha())
+
+    def RenderTime(self):
+        # Simulation time this frame shows, between the last two ticks
+        if self.previous_state is None:
+            return self.sim.time
+        return self.sim.time - (1.0 - self.timestep.Alpha()) * self.timestep.dt
+
+    def CullRadius(self, builder):
+        # Half-extent of a mesh's bounding box, how far past the view edge an instance can still show
+        vertices, _ = self.meshes.store.Get(builder)
+        return float(np.abs(vertices.reshape(-1, 6)[:, :2]).max(initial=0.0))
+
+    def SetBatch(self, name, builder, count, indices, positions, shown=True):
+        # Refresh the on-screen instances of a batch group. Off-screen ones keep their old matrices and
+        # are hidden, so scrolling past them costs nothing until they come back into view.
+        matrices = self.batch_matrices.get(name)
+        if matrices is None or len(matrices) != count:
+            matrices = self.batch_matrices[name] = np.zeros((count, 4, 4), dtype=np.float32)
+        matrices[indices] = ModelMatrices(positions)
+        visible = np.zeros(count, dtype=np.bool_)
+        visible[indices] = True
+        self.batch.Set(name, *self.meshes.store.Get(builder), matrices, visible & shown)
 
     def DrawScene(self):
+        # Scroll with the player; everything below is culled against the view through the
+        # simulation's grids, so only what's on screen is transformed and drawn
+        self.camera.Follow(self.objects[0].transform.position, self.sim.world_min, self.sim.world_max)
         self.camera.Update(self.shader)
+        self.camera.Update(self.instanced_shader)
         
-        # Draw vine if active
-        if self.vine_active:
-            # Update vine vertices to connect player to target
-            vine_vertices = np.array([
-                self.vine_start[0], self.vine_start[1], self.vine_start[2], 0, 0.5, 0,
-                self.vine_end[0], self.vine_end[1], self.vine_end[2], 0, 0.5, 0
-            ], dtype=np.float32)
-            
-            # Update VBO with new vertices
-            glBindBuffer(GL_ARRAY_BUFFER, self.vine_object.vbo.ID)
-            glBufferData(GL_ARRAY_BUFFER, vine_vertices.nbytes, vine_vertices, GL_STATIC_DRAW)
-            
-            # Draw the vine line
-            glLineWidth(3.0)  # Make the line thicker
-            self.vine_object.Draw()
-            glLineWidth(1.0)  # Reset line width
+        # Vine from the player to its target leaf, drawn along with any other dynamic geometry
+        if self.sim.vine_active:
+            self.stream.Lines(self.sim.vine_start, self.sim.vine_end, [0, 0.5, 0], line_width=3.0)
+        self.stream.Draw(self.shader)
         
+        UpdateTransforms([obj.transform for obj in self.objects])
         for obj in self.objects:
-            if not (isinstance(obj, Object) and 
-                   'collected' in obj.properties and 
-                   obj.properties['collected']):
-                obj.Draw()
-            
-    def check_collisions(self, deltaTime):
-        player_pos = self.objects[1].properties['position']
-        player_radius = 30
-
-        self.is_grounded = False
-
-        # Check platform collisions
-        for platform in self.platforms:
-            platform_pos = platform.properties['position']
-            distance = np.sqrt(
-                (player_pos[0] - platform_pos[0])**2 + 
-                (player_pos[1] - platform_pos[1])**2
-            )
-            
-            if distance < 60:
-                if player_pos[2] > platform_pos[2]:
-                    self.is_grounded = True
-                    self.player_position[2] = platform_pos[2] + 40
-                    self.player_velocity_z = 0
-
-        # Check key collection
-        for key in self.keys:
-            if not key.properties['collected']:
-                key_pos = key.properties['position']
-                key_distance = np.sqrt(
-                    (player_pos[0] - key_pos[0])**2 + 
-                    (player_pos[1] - key_pos[1])**2
-                )
-                if key_distance < 70:
-                    key.properties['collected'] = True
-                    self.keys_collected += 1
-                    print(f"Key collected! Total: {self.keys_collected}/3")
-
-        # Ground (banks) collision
-        if self.player_position[0] <= -400 or self.player_position[0] >= 400:
-            if self.player_position[2] <= 0:
-                self.player_position[2] = 0
-                self.player_velocity_z = 0
-                self.is_grounded = True
-
-        # Check if in water and not on platform
-        if -400 < player_pos[0] < 400 and not self.is_grounded:
-            if self.player_position[2] <= 10:
-                if not self.is_drowning:
-                    self.is_drowning = True
-                if self.screen == 1:  # Original water mechanics for map 1
-                    # Deplete oxygen instead of using drowning timer
-                    self.oxygen_level = max(0, self.oxygen_level - deltaTime)
-                    
-                    # First 2 seconds: slow movement and damage
-                    if self.oxygen_level > 0:
-                        self.player_speed = self.water_speed
-                        damage = (10 * deltaTime)
-                        self.player_health = max(0, self.player_health - damage)
-                    else:
-                        # After oxygen depleted: death
-                        if self.player_lives > 1:
-                            self.player_lives -= 1
-                            self.player_health = 100
-                            self.player_position = np.array([-450, 0, 0], dtype=np.float32)
-                            self.player_velocity_z = 0
-                            self.is_grounded = True
-                            self.objects[1].properties['position'] = self.player_position
-                            self.oxygen_level = self.max_oxygen  # Reset oxygen on death
-                        else:
-                            self.screen = 3
-                        
-                        self.is_drowning = False
-                
-                elif self.screen == 4:  # Modified water mechanics for map 2
-                    self.player_speed = self.water_speed * 0.05
-                        
-                    
-                    
-            
+            obj.Draw()
+
+        # Keys and leaves only change when a key is collected or a leaf toggles, so they live in the
+        # static batch and are re-uploaded only then. Moving platforms and enemies change every tick
+        # and stay instanced, one draw per mesh type.
+        keys = self.camera.Visible(self.sim.key_grid, self.sim.keys.position, self.CullRadius(CreateKey))
+        self.SetBatch('keys', CreateKey, len(self.sim.keys.position), keys, self.sim.keys.position[keys], ~self.sim.keys.collected)
+
+        platform_builder = CreatePlatform if self.current_map == 1 else CreateLeafPlatform
+        platforms = self.camera.Visible(self.sim.platform_grid, self.sim.platforms.position, self.CullRadius(platform_builder))
+        if self.current_map == 1:
+            self.scene.Mesh(CreatePlatform).DrawInstanced(self.instanced_shader, ModelMatrices(MoverPositions(self.sim.platforms, self.RenderTime(), platforms)))
         else:
-            # Out of water behavior
-            self.is_drowning = False
-            if self.screen == 1:  # Only regenerate oxygen in map 1
-                self.oxygen_level = min(self.max_oxygen, self.oxygen_level + self.oxygen_regen_rate * deltaTime)
-            self.player_speed = self.normal_speed
-
-        # Constant oxygen depletion in map 2
-        if self.screen == 4 or self.current_map == 2:
-            depletion_rate = self.max_oxygen / 100.0  # Deplete fully in 100 seconds
-            self.oxygen_level = max(0, self.oxygen_level - depletion_rate * deltaTime)
-            if self.oxygen_level <= 0:
-                if self.player_lives > 1:
-                    self.player_lives -= 1
-                    self.player_health = 100
-                    self.player_position = np.array([-450, 0, 0], dtype=np.float32)
-                    self.player_velocity_z = 0
-                    self.is_grounded = True
-                    self.objects[1].properties['position'] = self.player_position
-                    self.oxygen_level = self.max_oxygen  # Reset oxygen on death
-                else:
-                    self.screen = 3
-
-        # Check win condition for map 1
-        if self.screen == 1 and (player_pos[0] > 400) and (player_pos[1] > -50) and (player_pos[1] < 50) and (self.keys_collected == 3):
-            self.screen = 4  # Advance to map 2
-            self.current_map = 2  # Update map number
-            self.keys_collected = 0  # Reset keys for new map
-            self.player_position = np.array([-450.0, 0.0, 1.0], dtype=np.float32)  # Reset player position
-            self.player_velocity_z = 0
-            self.is_grounded = True
-            self.InitScreen()  # Initialize map 2 (this will handle clearing and creating new objects)
-            return
-        # Check win condition for map 2
-        elif self.screen == 4 and (player_pos[0] > 400) and (player_pos[1] > -50) and (player_pos[1] < 50) and (self.keys_collected == 3):
-            #self.screen = 3  # Victory screen
-            print("Victory!")
-            self.screen = 2
-            return
-
-        # Check enemy collisions
-        for enemy in self.enemies:
-            enemy_pos = enemy.properties['position']
-            distance = np.sqrt(
-                (player_pos[0] - enemy_pos[0])**2 + 
-                (player_pos[1] - enemy_pos[1])**2
-            )
-            
-            if distance < 50:  # Collision radius for enemy
-                # Deduct health
-                damage_per_second = 5
-                damage_this_frame = (damage_per_second * deltaTime)
-                if damage_this_frame > 0:
-                    self.player_health = max(0, self.player_health - damage_this_frame)
-                
-                if self.player_health <= 0 and self.player_lives > 0:
-                    self.player_lives -= 1
-                    self.player_health = 100
-                    self.player_position = np.array([-450, 0, 0], dtype=np.float32)
-                    self.player_velocity_z = 0
-                    self.is_grounded = True
-                    self.objects[1].properties['position'] = self.player_position
-                elif self.player_health <= 0:
-                    self.screen = 3  # Game Over
+            self.SetBatch('leaves', CreateLeafPlatform, len(self.sim.platforms.position), platforms, MoverPositions(self.sim.platforms, self.RenderTime(), platforms))
+        self.batch.Draw()
+
+        enemies = self.camera.Visible(self.sim.enemy_grid, self.sim.enemies.position, self.CullRadius(CreateEnemy))
+        self.scene.Mesh(CreateEnemy).DrawInstanced(self.instanced_shader, ModelMatrices(MoverPositions(self.sim.enemies, self.RenderTime(), enemies)))
+
+    def Delete(self):
+        # Free every GPU resource the game holds
+        self.scene.Teardown()
+        self.objects = []
+        self.meshes.Delete()
+        self.stream.Delete()
+        self.batch.Delete()
+        self.shader.Delete()
+        self.instanced_shader.Delete()
 
     def save_game(self):
-        save_data = {
-            'map': self.current_map,
-            'lives': self.player_lives,
-            'health': self.player_health,
-            'keys_collected': self.keys_collected,
-            'elapsed_time': self.elapsed_time,
-            
-        }
+        # Full world state in the binary save format; only blocks changed since the last save are written.
+        # Shared tables that haven't changed since the last save are skipped without reading them.
+        state = self.sim.GetState(share=True)
+        state['game'] = np.array([self.elapsed_time], dtype=np.float64)
         
         try:
-            with open(self.save_file, 'w') as f:
-                json.dump(save_data, f, indent=4)
+            self.save_writer.Save(state)
             print("Game saved successfully!")
         except Exception as e:
             print(f"Error saving game: {e}")
 
     def load_game(self):
         try:
-            if not os.path.exists(self.save_file):
+            self.StopRecording()
+            self.StopReplay()
+            if os.path.exists(self.save_file) and savefile.IsSaveFile(self.save_file):
+                state = savefile.Load(self.save_file)
+                self.sim.SetState(state)
+                self.elapsed_time = float(state['game'][0])
+            elif os.path.exists(self.legacy_save_file):
+                # Older JSON saves only hold the player's stats
+                with open(self.legacy_save_file, 'r') as f:
+                    save_data = json.load(f)
+                self.sim.NewGame(save_data['map'], save_data['lives'], save_data['health'])
+                self.elapsed_time = save_data['elapsed_time']
+            else:
                 print("No save file found!")
                 return False
 
-            with open(self.save_file, 'r') as f:
-                save_data = json.load(f)
-
             # Set the correct screen/map before initializing objects
-            self.screen = 1 if save_data['map'] == 1 else 4
-            self.current_map = save_data['map']
-
-            # Initialize the correct map's objects
-            self.InitScreen(lives=save_data['lives'], health=save_data['health'], keys_collected=save_data['keys_collected'], elapsed_time=save_data['elapsed_time'])
-            
-            
+            self.screen = self.sim.screen
+            self.current_map = self.sim.current_map
+            self.start_time = glfw.get_time()
+            self.timestep.Reset()
+            self.previous_state = None
+            self.journal = Journal(self.sim)
+            self.BuildSceneObjects()
             
             print("Game loaded successfully!")
             return True
@@ -956,48 +724,3 @@ class Game:
             print(f"Error loading game: {e}")
             return False
 
-    def find_closest_leaf(self):
-        player_pos = np.array([self.player_position[0], self.player_position[1]])
-        closest_dist = float('inf')
-        second_closest_dist = float('inf')
-        closest_platform = None
-        second_closest_platform = None
-        
-        # Check if player is on the rightmost leaf (at [300, 0])
-       
-        for platform in self.platforms:
-            if (player_pos[0] >= 300 and self.keys_collected == 3):
-                # Create a fake "platform" for the right bank
-                right_bank = type('', (), {})()
-                right_bank.properties = {
-                    'position': np.array([450, 0, 0], dtype=np.float32),
-                    'is_active': True
-                }
-                return right_bank, 150  # Fixed distance to make it reachable
-        
-        # Normal closest leaf finding logic
-        for platform in self.platforms:
-            # Only consider active leaves
-            if not platform.properties.get('is_active', False):
-                continue
-                
-            platform_pos = platform.properties['position'][:2]
-            dist = np.linalg.norm(player_pos - platform_pos)
-            
-            if dist < closest_dist:
-                # Current closest becomes second closest
-                second_closest_dist = closest_dist
-                second_closest_platform = closest_platform
-                # Update closest
-                closest_dist = dist
-                closest_platform = platform
-            elif dist < second_closest_dist:
-                # Update second closest
-                second_closest_dist = dist
-                second_closest_platform = platform
-        
-        # If player is on or very close to the closest leaf, return the second closest
-        if closest_dist < 1:  # Using small threshold instead of exactly 0
-            return second_closest_platform, second_closest_dist
-        return closest_platform, closest_dist
-
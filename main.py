@@ -1,5 +1,9 @@
+import argparse
 from OpenGL.GL import *
 from utils.window_manager import Window
+from utils.recording import LoadRecording
+from utils.profiler import PROFILER
+from utils.graphics import GL_RESOURCES
 from game import Game
 
 class App:
@@ -10,14 +14,39 @@ class App:
     def RenderLoop(self):
 
         while self.window.IsOpen():
-            inputs, time = self.window.StartFrame(0.0, 0.0, 0.0, 1.0)
+            PROFILER.BeginFrame()
+            with PROFILER.Scope("StartFrame"):
+                inputs, time = self.window.StartFrame(0.0, 0.0, 0.0, 1.0)
             self.game.ProcessFrame(inputs, time)
-            self.window.EndFrame()
-        
+            if PROFILER.enabled:
+                PROFILER.DrawOverlay()
+            with PROFILER.Scope("EndFrame"):
+                self.window.EndFrame()
+            PROFILER.EndFrame()
+
+        self.game.StopRecording()
+        self.game.Delete()
+        if GL_RESOURCES.debug:
+            print(GL_RESOURCES.Report())
         self.window.Close()
 
 if __name__ == "__main__":
-    app = App(1000, 1000)
-    app.RenderLoop()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--record", metavar="DIRECTORY", help="Record every game played into this directory")
+    parser.add_argument("--replay", metavar="FILE", help="Play back a recorded session")
+    parser.add_argument("--level", metavar="FILE", help="Play this level file as map 1, e.g. assets/levels/map1_long.lvl")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier")
+    parser.add_argument("--profile", action="store_true", help="Time each part of the frame and show the profiler overlay")
+    parser.add_argument("--debug-gl", action="store_true", help="Track where GL resources are created and report leaks on exit")
+    args = parser.parse_args()
 
+    PROFILER.Enable(args.profile)
+    GL_RESOURCES.debug = args.debug_gl
 
+    app = App(1000, 1000)
+    app.game.record_directory = args.record
+    if args.level:
+        app.game.sim.layouts[1] = args.level
+    if args.replay:
+        app.game.StartReplay(LoadRecording(args.replay), args.speed)
+    app.RenderLoop()
@@ -0,0 +1,35 @@
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from utils.recording import Verify
+
+def FindRecordings(paths):
+    # Recording files given directly, plus every *.rec under the given directories
+    recordings = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                recordings.extend(os.path.join(root, name) for name in sorted(files) if name.endswith(".rec"))
+        else:
+            recordings.append(path)
+    return recordings
+
+def VerifyAll(recordings, workers=None, chunk_size=16):
+    # {path : True/False/None} for every recording, replayed in parallel
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(recordings, pool.map(Verify, recordings, chunksize=chunk_size)))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded sessions headlessly and check they end in the recorded state")
+    parser.add_argument("paths", nargs="+", help="Recording files or directories of *.rec files")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    results = VerifyAll(FindRecordings(args.paths), args.workers)
+    for path, result in results.items():
+        print(f"{'unchecked' if result is None else 'ok' if result else 'MISMATCH'}  {path}")
+
+    mismatches = sum(result is False for result in results.values())
+    print(f"{len(results)} recordings, {mismatches} mismatches")
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,151 @@
+import argparse
+import copy
+import csv
+import itertools
+import json
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from assets.maps.maps import map1Layout, map2Layout
+from utils.batch_simulation import BatchSimulation, W, A, S, D, SPACE, E, ACTIONS
+from utils.simulation import MAP2_SCREEN, VICTORY_SCREEN, GAME_OVER_SCREEN
+
+# Parameters that live in the map layout dicts, everything else is a Simulation attribute
+LAYOUT_PARAMETERS = set(map1Layout) | set(map2Layout)
+
+# Default sweep: tuning constants that used to be hardcoded in Game.__init__ / InitScreen
+DEFAULT_GRID = {
+    'vertical_speed' : [100.0, 150.0, 200.0],
+    'horizontal_speed' : [80.0, 120.0, 160.0],
+    'enemy_speed' : [150.0, 200.0, 250.0],
+    'max_oxygen' : [1.0, 2.0, 3.0],
+}
+
+# Columns of the shared results array
+METRICS = ("win_rate", "game_over_rate", "mean_time_to_complete", "mean_keys", "mean_lives_left")
+
+def ParameterGrid(grid):
+    # Every combination of the grid's values, as a list of {name : value} dicts
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+def GreedyPolicy(batch, rng, epsilon=0.1):
+    # Simple bot: head for the nearest uncollected key, then for the exit. Jumps whenever
+    # it can on map 1; on map 2 it taps E when the vine target is closer to where it wants to go.
+    # With probability epsilon a world presses random keys instead, so sessions differ.
+    player = batch.player_position[:, :2]
+    key_dists = np.linalg.norm(batch.key_position[None, :, :2] - player[:, None], axis=-1)
+    key_dists[batch.key_collected] = np.inf
+    has_key_left = np.isfinite(key_dists).any(axis=1)
+
+    target = np.tile(batch.exit_position[:2], (batch.n_worlds, 1))
+    if key_dists.shape[1] > 0:
+        nearest = np.argmin(key_dists, axis=1)
+        target[has_key_left] = batch.key_position[nearest[has_key_left], :2]
+    delta = target - player
+
+    actions = np.zeros((batch.n_worlds, len(ACTIONS)), dtype=np.bool_)
+    actions[:, D] = delta[:, 0] > 5
+    actions[:, A] = delta[:, 0] < -5
+    actions[:, W] = delta[:, 1] > 5
+    actions[:, S] = delta[:, 1] < -5
+    if batch.map_number == 1:
+        actions[:, SPACE] = True
+    else:
+        swing_to, _ = batch.FindClosestLeaf()
+        closer = np.linalg.norm(target - swing_to[:, :2], axis=1) < np.linalg.norm(delta, axis=1)
+        actions[:, E] = closer & ~batch.previous_actions[:, E]  # A swing needs a fresh press
+
+    explore = rng.random(batch.n_worlds) < epsilon
+    actions[explore] = rng.random((int(explore.sum()), len(ACTIONS))) < 0.5
+    return actions
+
+def RunConfig(map_number, config, worlds, max_time, dt, seed=0):
+    # Simulate one parameter combination and return its METRICS row
+    layout = copy.deepcopy(map1Layout if map_number == 1 else map2Layout)
+    tuning = {}
+    for name, value in config.items():
+        if name in LAYOUT_PARAMETERS:
+            layout[name] = value
+        else:
+            tuning[name] = value
+
+    batch = BatchSimulation(worlds, map_number, layout=layout, tuning=tuning)
+    rng = np.random.default_rng(seed)
+    for _ in range(int(np.ceil(max_time / dt))):
+        if not (batch.screen == batch.play_screen).any():
+            break
+        batch.Step(GreedyPolicy(batch, rng), dt)
+
+    # A finished world's clock stops, so its time is the time to complete
+    won = batch.screen == (MAP2_SCREEN if map_number == 1 else VICTORY_SCREEN)
+    return [
+        won.mean(),
+        (batch.screen == GAME_OVER_SCREEN).mean(),
+        batch.time[won].mean() if won.any() else np.nan,
+        batch.keys_collected.mean(),
+        batch.player_lives.mean(),
+    ]
+
+def RunChunk(shm_name, n_configs, first, configs, map_number, worlds, max_time, dt):
+    # Worker: run a slice of the grid and write its rows straight into the shared results array
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        results = np.ndarray((n_configs, len(METRICS)), dtype=np.float64, buffer=shm.buf)
+        for i, config in enumerate(configs):
+            results[first + i] = RunConfig(map_number, config, worlds, max_time, dt, seed=first + i)
+    finally:
+        shm.close()
+    return len(configs)
+
+def Sweep(grid, map_number=1, worlds=256, max_time=60.0, dt=1/60, workers=None, chunk_size=4):
+    configs = ParameterGrid(grid)
+    n_configs = len(configs)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, n_configs * len(METRICS) * 8))
+    try:
+        results = np.ndarray((n_configs, len(METRICS)), dtype=np.float64, buffer=shm.buf)
+        results[:] = np.nan
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(RunChunk, shm.name, n_configs, first, configs[first:first + chunk_size], map_number, worlds, max_time, dt)
+                for first in range(0, n_configs, chunk_size)
+            ]
+            for future in futures:
+                future.result()
+
+        table = results.copy()
+    finally:
+        shm.close()
+        shm.unlink()
+    return configs, table
+
+def WriteTable(path, configs, table):
+    names = sorted(configs[0]) if configs else []
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(names + list(METRICS))
+        for config, row in zip(configs, table):
+            writer.writerow([config[name] for name in names] + [f"{value:.4f}" for value in row])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless level-balance sweep over map parameters")
+    parser.add_argument("--map", type=int, default=1, choices=[1, 2])
+    parser.add_argument("--grid", help="JSON file of {parameter: [values]}, defaults to DEFAULT_GRID")
+    parser.add_argument("--worlds", type=int, default=256, help="Simulated sessions per configuration")
+    parser.add_argument("--max-time", type=float, default=60.0, help="Seconds of game time per session")
+    parser.add_argument("--dt", type=float, default=1/60)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=4, help="Configurations per worker task")
+    parser.add_argument("--output", default="sweep_results.csv")
+    args = parser.parse_args()
+
+    grid = DEFAULT_GRID
+    if args.grid:
+        with open(args.grid, 'r') as f:
+            grid = json.load(f)
+
+    configs, table = Sweep(grid, args.map, args.worlds, args.max_time, args.dt, args.workers, args.chunk_size)
+    WriteTable(args.output, configs, table)
+    print(f"Wrote {len(configs)} configurations to {args.output}")
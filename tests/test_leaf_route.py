@@ -0,0 +1,22 @@
+from utils.simulation import Simulation, MAP2_SCREEN, VICTORY_SCREEN
+from utils.inputs import KEY_E
+
+DT = 1 / 120
+
+def test_route_reaches_the_bank():
+    # Press E in the step that starts at or after each planned time
+    sim = Simulation()
+    sim.NewGame(2)
+    route = sim.RouteToBank(DT)
+    assert route is not None
+    swings = iter(time for time, _ in route)
+    planned = next(swings, None)
+    for _ in range(int(30 / DT)):
+        if sim.screen != MAP2_SCREEN:
+            break
+        press = planned is not None and sim.time >= planned
+        if press:
+            planned = next(swings, None)
+        sim.Step(KEY_E if press else 0, DT)
+    assert sim.screen == VICTORY_SCREEN
+    assert sim.keys_collected == 3
@@ -0,0 +1,30 @@
+import errno
+import os
+import numpy as np
+from utils.meshstore import MeshStore
+from assets.objects.objects import CreatePlatform
+
+def test_unwritable_directory_keeps_meshes_in_memory(tmp_path):
+    # A file where the cache directory should be: every write fails
+    directory = tmp_path / "mesh_cache"
+    directory.write_bytes(b"")
+    store = MeshStore(str(directory))
+    vertices, indices = store.Get(CreatePlatform)
+    assert len(vertices) and len(indices)
+    assert store.Get(CreatePlatform)[0] is vertices
+    assert not store.writable
+
+def test_failed_write_leaves_no_entry(tmp_path, monkeypatch):
+    def DiskFull(*args, **kwargs):
+        raise OSError(errno.ENOSPC, "No space left on device")
+    monkeypatch.setattr(np, "savez", DiskFull)
+    store = MeshStore(str(tmp_path))
+    store.Get(CreatePlatform)
+    assert os.listdir(tmp_path) == []
+
+def test_written_entry_is_read_back(tmp_path):
+    vertices, indices = MeshStore(str(tmp_path)).Get(CreatePlatform)
+    assert [name for name in os.listdir(tmp_path) if not name.endswith(".npz")] == []
+    cached = MeshStore(str(tmp_path)).Load(os.listdir(tmp_path)[0][:-len(".npz")])
+    np.testing.assert_array_equal(cached[0], vertices)
+    np.testing.assert_array_equal(cached[1], indices)
@@ -0,0 +1,41 @@
+from utils.simulation import Simulation, GAME_OVER_SCREEN
+from utils.recording import Recorder, Verify
+from utils.inputs import KEY_D, KEY_E
+
+DT = 1 / 120
+
+def Play(sim, recorder, masks):
+    for mask in masks:
+        sim.Step(mask, DT)
+        recorder.Record(mask, DT)
+
+def RecordSession(sim, path, map_number, masks):
+    sim.NewGame(map_number)
+    recorder = Recorder(str(path), map_number, sim.player_lives, sim.player_health)
+    Play(sim, recorder, masks)
+    recorder.Close(sim)
+
+def test_second_session_after_drowning_verifies(tmp_path):
+    # Walk off the bank into the water and stay there until every life is gone
+    sim = Simulation()
+    sim.NewGame(1)
+    ticks = 0
+    while sim.screen != GAME_OVER_SCREEN:
+        sim.Step(KEY_D if sim.player_position[0] <= sim.left_bank_x else 0, DT)
+        ticks += 1
+        assert ticks < 120 * 60
+    path = tmp_path / "second.rec"
+    RecordSession(sim, path, 1, [KEY_D] * 60 + [0] * 60)
+    assert Verify(str(path))
+
+def test_second_session_after_vine_swing_verifies(tmp_path):
+    # End a map 2 session in the middle of a vine swing
+    sim = Simulation()
+    sim.NewGame(2)
+    for _ in range(10):
+        sim.Step(0, DT)
+    sim.Step(KEY_E, DT)
+    assert sim.vine_active
+    path = tmp_path / "second.rec"
+    RecordSession(sim, path, 1, [KEY_D] * 60 + [0] * 60)
+    assert Verify(str(path))
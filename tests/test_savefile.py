@@ -0,0 +1,60 @@
+import os
+import numpy as np
+import pytest
+from utils import savefile
+from utils.simulation import Simulation
+from utils.inputs import KEY_D
+
+def States(ticks):
+    # Copies of the world state after each of `ticks` ticks
+    sim = Simulation()
+    sim.NewGame(1)
+    states = []
+    for _ in range(ticks):
+        sim.Step(KEY_D, 1 / 120)
+        states.append({name : np.array(array) for name, array in sim.GetState().items()})
+    return states
+
+def AssertStatesEqual(loaded, expected):
+    assert loaded.keys() == expected.keys()
+    for name in expected:
+        np.testing.assert_array_equal(loaded[name], expected[name])
+
+@pytest.fixture
+def saved(tmp_path):
+    # A save file holding a full frame and two delta frames, and the offset the last frame starts at
+    path = str(tmp_path / "game.sav")
+    states = States(3)
+    writer = savefile.SaveWriter(path)
+    for state in states[:2]:
+        writer.Save(state)
+    last_frame = os.path.getsize(path)
+    writer.Save(states[2])
+    return path, states, last_frame
+
+def test_load_returns_last_save(saved):
+    path, states, _ = saved
+    AssertStatesEqual(savefile.Load(path), states[2])
+
+def test_truncated_last_frame_loads_previous_save(saved):
+    path, states, last_frame = saved
+    with open(path, 'r+b') as f:
+        f.truncate((last_frame + os.path.getsize(path)) // 2)
+    AssertStatesEqual(savefile.Load(path), states[1])
+
+def test_corrupt_last_frame_loads_previous_save(saved):
+    path, states, last_frame = saved
+    with open(path, 'r+b') as f:
+        f.seek(-1, os.SEEK_END)
+        f.seek(-8, os.SEEK_CUR)  # Inside the last payload, before the frame checksum
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0xFF]))
+    AssertStatesEqual(savefile.Load(path), states[1])
+
+def test_truncated_first_frame_raises(saved):
+    path, _, _ = saved
+    with open(path, 'r+b') as f:
+        f.truncate(savefile.HEADER.size + savefile.FRAME.size + 4)
+    with pytest.raises(savefile.SaveFormatError):
+        savefile.Load(path)
@@ -0,0 +1,294 @@
+import numpy as np
+from utils.inputs import BITS
+from utils.motion import Trajectory
+from utils.collision import SweptOverlap, SweptRange, Touched, Durations, Total, Coverage
+from utils.simulation import Simulation, MAP2_SCREEN, VICTORY_SCREEN, GAME_OVER_SCREEN, PLATFORM_RADIUS, KEY_RADIUS, ENEMY_RADIUS, GOAL_HALF_HEIGHT, BANK_SWING_REACH, LEAF_RISE
+
+# Columns of the (N, actions) input array
+ACTIONS = ("W", "A", "S", "D", "SPACE", "E")
+W, A, S, D, SPACE, E = range(len(ACTIONS))
+
+def ActionsFromInputs(inputs):
+    # One row of the action array from an input bitmask
+    return np.array([inputs & BITS[action] != 0 for action in ACTIONS], dtype=np.bool_)
+
+class BatchSimulation:
+    # N independent worlds on the same map, stepped in lockstep. Every piece of state has a
+    # leading world dimension, so one Step() advances all worlds with a handful of array ops.
+    # A world that finishes map 1 stops with screen == MAP2_SCREEN instead of loading map 2.
+    def __init__(self, n_worlds, map_number=1, layout=None, tuning=None):
+        self.n_worlds = n_worlds
+        self.map_number = map_number
+        self.layout = layout  # Replaces the map's layout dict when given
+        self.tuning = tuning if tuning is not None else {}  # Simulation attribute overrides, e.g. max_oxygen
+        self.Reset()
+
+    def Reset(self):
+        n = self.n_worlds
+
+        # Build the layout once with the scalar simulation and broadcast it over the worlds
+        template = Simulation()
+        if self.layout is not None:
+            template.layouts[self.map_number] = self.layout
+        for name, value in self.tuning.items():
+            setattr(template, name, value)
+        template.NewGame(self.map_number)
+        self.template = template
+        self.exit_position = template.exit_position  # On the right bank, placed from the world extent
+
+        self.play_screen = template.screen
+        self.screen = np.full(n, template.screen, dtype=np.int8)
+        self.time = np.zeros(n, dtype=np.float64)  # Clocks and timers stay float64 like the scalar simulation's
+        self.player_health = np.full(n, template.player_health, dtype=np.float64)
+        self.player_lives = np.full(n, template.player_lives, dtype=np.int32)
+        self.keys_collected = np.zeros(n, dtype=np.int32)
+        self.player_position = np.tile(template.player_position, (n, 1))
+        self.player_velocity_z = np.zeros(n, dtype=np.float64)
+        self.is_grounded = np.full(n, template.is_grounded, dtype=np.bool_)
+        self.player_speed = np.full(n, template.normal_speed, dtype=np.float32)
+        self.is_drowning = np.zeros(n, dtype=np.bool_)
+        self.oxygen_level = np.full(n, template.max_oxygen, dtype=np.float64)
+        self.vine_active = np.zeros(n, dtype=np.bool_)
+        self.vine_timer = np.zeros(n, dtype=np.float64)
+        self.previous_actions = np.zeros((n, len(ACTIONS)), dtype=np.bool_)
+
+        # Per-world tuning, so one batch can hold many parameter variants
+        self.jump_speed = np.full(n, template.jump_speed, dtype=np.float32)
+        self.gravity = np.full(n, template.gravity, dtype=np.float32)
+        self.normal_speed = np.full(n, template.normal_speed, dtype=np.float32)
+        self.water_speed = np.full(n, template.water_speed, dtype=np.float32)
+        self.max_oxygen = np.full(n, template.max_oxygen, dtype=np.float32)
+        self.oxygen_regen_rate = np.full(n, template.oxygen_regen_rate, dtype=np.float32)
+        self.leaf_toggle_interval = np.full(n, template.leaf_toggle_interval, dtype=np.float32)
+        self.vine_duration = template.vine_duration
+        self.vine_range = template.vine_range
+
+        # Entities: (N, count, ...) state, (count, ...) layout shared by every world
+        self.platform_position = np.tile(template.platforms.position, (n, 1, 1))
+        self.platform_direction = np.tile(template.platforms.direction, (n, 1))
+        self.platform_speed = np.tile(template.platforms.speed, (n, 1))
+        self.platform_bounds = template.platforms.bounds
+        self.platform_travel = template.platforms.travel
+        self.platform_axis = template.platforms.movement_type.astype(np.int64)
+        self.phase_offset = template.platforms.phase_offset
+        self.base_y = template.platforms.base_y
+        self.is_active = np.tile(template.platforms.is_active, (n, 1))
+
+        self.key_position = template.keys.position
+        self.key_collected = np.zeros((n, len(template.keys)), dtype=np.bool_)
+
+        self.enemy_position = np.tile(template.enemies.position, (n, 1, 1))
+        self.enemy_direction = np.tile(template.enemies.direction, (n, 1))
+        self.enemy_speed = np.tile(template.enemies.speed, (n, 1))
+        self.enemy_bounds = template.enemies.bounds
+        self.enemy_travel = template.enemies.travel
+        self.enemy_axis = template.enemies.movement_type.astype(np.int64)
+
+    def Step(self, actions, dt):
+        # actions: (N, len(ACTIONS)) bool array, one row per world
+        actions = np.asarray(actions, dtype=np.bool_)
+        live = self.screen == self.play_screen
+        actions = actions & live[:, None]
+        step_dt = np.where(live, dt, 0.0)
+
+        self.time += step_dt
+        self.UpdateMovers(self.enemy_position, self.enemy_direction, self.enemy_speed, self.enemy_travel, self.enemy_bounds, self.enemy_axis)
+        self.UpdateMovers(self.platform_position, self.platform_direction, self.platform_speed, self.platform_travel, self.platform_bounds, self.platform_axis)
+        previous_position = self.player_position.copy()
+        self.UpdatePlayer(actions, step_dt)
+        self.CheckCollisions(live, step_dt, previous_position)
+
+        if self.map_number == 2:
+            self.UpdateVine(actions, live, step_dt)
+            self.UpdateLeaves()
+
+        self.previous_actions = actions
+
+    def UpdateMovers(self, position, direction, speed, travel, bounds, axis):
+        # Every world's movers evaluated on their trajectories at that world's clock
+        if position.shape[1] == 0:
+            return
+        columns = np.arange(position.shape[1])
+        moving = speed != 0
+        values, directions = Trajectory(travel, speed, bounds, self.time[:, None])
+        position[:, columns, axis] = np.where(moving, values, position[:, columns, axis])
+        direction[...] = np.where(moving, directions, direction)
+
+    def MoverPositions(self, position, speed, travel, bounds, axis, time):
+        # Copy of every world's mover positions evaluated at that world's `time`
+        position = position.copy()
+        if position.shape[1] == 0:
+            return position
+        columns = np.arange(position.shape[1])
+        values, _ = Trajectory(travel, speed, bounds, time[:, None])
+        position[:, columns, axis] = np.where(speed != 0, values, position[:, columns, axis])
+        return position
+
+    def UpdatePlayer(self, actions, dt):
+        move_x = self.player_speed * (actions[:, D].astype(np.float32) - actions[:, A])
+        move_y = self.player_speed * (actions[:, W].astype(np.float32) - actions[:, S])
+
+        # Jump with spacebar when grounded (map 1 only)
+        if self.map_number == 1:
+            jump = actions[:, SPACE] & self.is_grounded
+            self.player_velocity_z[jump] = self.jump_speed[jump]
+            self.is_grounded[jump] = False
+
+        # Only apply gravity if player is above ground level
+        airborne = (self.player_position[:, 2] > 0) | (self.player_velocity_z > 0)
+        self.player_velocity_z -= np.where(airborne, self.gravity * dt, 0)
+        self.player_position[~airborne, 2] = 0
+        self.player_velocity_z[~airborne] = 0
+        self.is_grounded |= ~airborne
+
+        # Round each displacement to float32 before adding, as the scalar simulation does
+        self.player_position[:, 0] += (move_x * dt).astype(np.float32)
+        self.player_position[:, 1] += (move_y * dt).astype(np.float32)
+        self.player_position[:, 2] += (self.player_velocity_z * dt).astype(np.float32)
+
+    def Respawn(self, worlds):
+        self.player_health[worlds] = 100
+        self.player_position[worlds] = self.template.respawn_position
+        self.player_velocity_z[worlds] = 0
+        self.is_grounded[worlds] = True
+
+    def LoseLife(self, worlds):
+        spare = worlds & (self.player_lives > 1)
+        self.player_lives[spare] -= 1
+        self.Respawn(spare)
+        self.oxygen_level[spare] = self.max_oxygen[spare]
+        self.screen[worlds & ~spare] = GAME_OVER_SCREEN
+
+    def PlanarDistances(self, player_pos, positions):
+        # (N, count) distances from each world's player to that world's (or the shared) entities
+        delta = positions[..., :2] - player_pos[:, None, :2]
+        return np.sqrt(np.sum(delta * delta, axis=-1))
+
+    def Sweep(self, start, end, centers_start, centers_end, radius):
+        # (N, count) (enter, leave) step fractions of each world's player path against the entities
+        return SweptOverlap(start[:, None], end[:, None], centers_start, centers_end, radius)
+
+    def CheckCollisions(self, live, dt, previous_position=None):
+        # Swept along each player's path since previous_position, as Simulation.CheckCollisions
+        player_pos = self.player_position.copy()
+        start = player_pos if previous_position is None else previous_position
+        start_time = self.time - dt
+        self.is_grounded[live] = False
+
+        # Platform collisions
+        on_platform = (self.PlanarDistances(player_pos, self.platform_position) < PLATFORM_RADIUS) & (player_pos[:, 2:3] > self.platform_position[:, :, 2])
+        grounded = on_platform.any(axis=1) & live
+        platform_top = np.where(on_platform, self.platform_position[:, :, 2], -np.inf).max(axis=1, initial=-np.inf) + 40
+        self.is_grounded |= grounded
+        self.player_position[grounded, 2] = platform_top[grounded]
+        self.player_velocity_z[grounded] = 0
+
+        # Key collection
+        picked_up = ~self.key_collected & Touched(*self.Sweep(start, player_pos, self.key_position, self.key_position, KEY_RADIUS)) & live[:, None]
+        self.key_collected |= picked_up
+        self.keys_collected += picked_up.sum(axis=1, dtype=np.int32)
+
+        # Ground (banks) collision
+        left_bank_x, right_bank_x = self.template.left_bank_x, self.template.right_bank_x
+        landed = live & ((self.player_position[:, 0] <= left_bank_x) | (self.player_position[:, 0] >= right_bank_x)) & (self.player_position[:, 2] <= 0)
+        self.player_position[landed, 2] = 0
+        self.player_velocity_z[landed] = 0
+        self.is_grounded |= landed
+
+        # In water and not on a platform
+        over_water = live & (left_bank_x < player_pos[:, 0]) & (player_pos[:, 0] < right_bank_x) & ~self.is_grounded
+        in_water = over_water & (self.player_position[:, 2] <= 10)
+        self.is_drowning |= in_water
+        if self.map_number == 1:
+            # Only the part of the step actually spent over water counts
+            platforms_start = self.MoverPositions(self.platform_position, self.platform_speed, self.platform_travel, self.platform_bounds, self.platform_axis, start_time)
+            enter, leave = self.Sweep(start, player_pos, platforms_start, self.platform_position, PLATFORM_RADIUS)
+            supported = player_pos[:, 2:3] > self.platform_position[:, :, 2]
+            left = SweptRange(start[:, 0], player_pos[:, 0], -np.inf, left_bank_x)
+            right = SweptRange(start[:, 0], player_pos[:, 0], right_bank_x, np.inf)
+            dry = Coverage(np.concatenate([np.where(supported, enter, np.inf), np.stack([left[0], right[0]], axis=1)], axis=1),
+                           np.concatenate([np.where(supported, leave, -np.inf), np.stack([left[1], right[1]], axis=1)], axis=1))
+            wet_dt = dt * (1.0 - dry)
+            self.oxygen_level[in_water] = np.maximum(0, self.oxygen_level[in_water] - wet_dt[in_water])
+
+            # Slow movement and damage until oxygen runs out, then death
+            breathing = in_water & (self.oxygen_level > 0)
+            self.player_speed[breathing] = self.water_speed[breathing]
+            self.player_health[breathing] = np.maximum(0, self.player_health[breathing] - 10 * wet_dt[breathing])
+            drowned = in_water & ~breathing
+            self.LoseLife(drowned)
+            self.is_drowning[drowned] = False
+        else:
+            self.player_speed[in_water] = self.water_speed[in_water] * 0.05
+
+        # Out of water behavior
+        dry = live & ~over_water
+        self.is_drowning[dry] = False
+        if self.map_number == 1:
+            self.oxygen_level[dry] = np.minimum(self.max_oxygen[dry], self.oxygen_level[dry] + self.oxygen_regen_rate[dry] * dt[dry])
+        self.player_speed[dry] = self.normal_speed[dry]
+
+        # Constant oxygen depletion in map 2 (fully depleted in 100 seconds)
+        if self.map_number == 2:
+            breathing = live & (self.screen != GAME_OVER_SCREEN)
+            self.oxygen_level[breathing] = np.maximum(0, self.oxygen_level[breathing] - (self.max_oxygen[breathing] / 100.0) * dt[breathing])
+            self.LoseLife(breathing & (self.oxygen_level <= 0))
+
+        at_right_bank = (live & (player_pos[:, 0] > right_bank_x) & (-GOAL_HALF_HEIGHT < player_pos[:, 1])
+                         & (player_pos[:, 1] < GOAL_HALF_HEIGHT) & (self.keys_collected == 3))
+        finished = at_right_bank & (self.screen == self.play_screen)
+        self.screen[finished] = MAP2_SCREEN if self.map_number == 1 else VICTORY_SCREEN
+
+        # Enemy collisions deal 5 damage per second, per enemy touching the player, for as long as it touched
+        enemies_start = self.MoverPositions(self.enemy_position, self.enemy_speed, self.enemy_travel, self.enemy_bounds, self.enemy_axis, start_time)
+        touching = Total(Durations(*self.Sweep(start, player_pos, enemies_start, self.enemy_position, ENEMY_RADIUS)))
+        hurt = live & ~finished & (touching > 0)
+        self.player_health[hurt] = np.maximum(0, self.player_health[hurt] - 5 * dt[hurt] * touching[hurt])
+        dead = hurt & (self.player_health <= 0)
+        respawn = dead & (self.player_lives > 0)
+        self.player_lives[respawn] -= 1
+        self.Respawn(respawn)
+        self.screen[dead & ~respawn] = GAME_OVER_SCREEN
+
+    def UpdateVine(self, actions, live, dt):
+        swing = actions[:, E] & ~self.previous_actions[:, E] & ~self.vine_active & (self.screen == MAP2_SCREEN)
+        if swing.any():
+            target, dist = self.FindClosestLeaf()
+            swing &= dist < self.vine_range
+            self.vine_active[swing] = True
+            self.vine_timer[swing] = 0
+            # Immediately move player to leaf center
+            self.player_position[swing] = target[swing]
+            self.player_velocity_z[swing] = 0
+            self.is_grounded[swing] = True
+
+        self.vine_timer[self.vine_active] += dt[self.vine_active]
+        self.vine_active &= self.vine_timer < self.vine_duration
+
+    def UpdateLeaves(self):
+        phase = self.time[:, None] + self.phase_offset
+        interval = self.leaf_toggle_interval[:, None]
+        self.is_active = (phase % (2.0 * interval)) < interval
+        self.platform_position[:, :, 1] = np.where(self.is_active, self.base_y + LEAF_RISE, self.base_y)
+
+    def FindClosestLeaf(self):
+        # Target position (N, 3) and distance (N,) of each world's vine swing, distance inf if none
+        n = self.n_worlds
+        dists = np.where(self.is_active, self.PlanarDistances(self.player_position, self.platform_position), np.inf)
+        order = np.argsort(dists, axis=1, kind='stable')[:, :2]
+        rows = np.arange(n)
+
+        # If player is on or very close to the closest leaf, use the second closest
+        pick = order[:, 0]
+        if order.shape[1] > 1:
+            pick = np.where(dists[rows, order[:, 0]] < 1, order[:, 1], pick)
+        elif order.shape[1] == 0:
+            return np.zeros((n, 3), dtype=np.float32), np.full(n, np.inf)
+        target = self.platform_position[rows, pick].copy()
+        dist = dists[rows, pick]
+
+        # From the rightmost leaf with all keys, the right bank is the target
+        to_bank = (self.player_position[:, 0] >= self.template.right_bank_x - BANK_SWING_REACH) & (self.keys_collected == 3)
+        target[to_bank] = self.exit_position
+        dist = np.where(to_bank, 150, dist)
+        return target, dist
@@ -0,0 +1,70 @@
+import numpy as np
+
+# Continuous (swept) collision over one simulation step. Within a step the player and every
+# entity are taken to move in a straight line from where they were at the start of the step to
+# where they are at the end, so a fast player, or a long step, can't skip past a circle that only
+# the middle of its path touched. Times are fractions of the step: 0 at its start, 1 at its end.
+# An overlap is an (enter, leave) interval; enter is the time of impact, and enter > leave means
+# no overlap during the step. Everything broadcasts, so the same calls serve one world or a batch.
+
+def SweptOverlap(start, end, centers_start, centers_end, radius):
+    # (enter, leave) of a point moving from start to end against circles moving from centers_start
+    # to centers_end, in the (x, y) plane. Relative to a circle the point moves in a straight line,
+    # so it is inside while |offset + t * velocity| < radius, a quadratic in t.
+    start = np.asarray(start, dtype=np.float64)
+    centers_start = np.asarray(centers_start, dtype=np.float64)
+    offset_x = start[..., 0] - centers_start[..., 0]
+    offset_y = start[..., 1] - centers_start[..., 1]
+    velocity_x = (end[..., 0] - start[..., 0]) - (centers_end[..., 0] - centers_start[..., 0])
+    velocity_y = (end[..., 1] - start[..., 1]) - (centers_end[..., 1] - centers_start[..., 1])
+    a = velocity_x * velocity_x + velocity_y * velocity_y
+    b = offset_x * velocity_x + offset_y * velocity_y
+    c = offset_x * offset_x + offset_y * offset_y - radius * radius
+    moving = a > 0
+    root = np.sqrt(np.maximum(b * b - a * c, 0.0))
+    divisor = np.where(moving, a, 1.0)
+    # Without relative motion it's inside for the whole step or not at all
+    first = np.where(moving, (-b - root) / divisor, np.where(c < 0, -np.inf, np.inf))
+    last = np.where(moving, (-b + root) / divisor, np.where(c < 0, np.inf, -np.inf))
+    hit = (first < last) & (first < 1) & (last > 0)
+    return np.where(hit, np.maximum(first, 0.0), np.inf), np.where(hit, np.minimum(last, 1.0), -np.inf)
+
+def SweptRange(start, end, lower, upper):
+    # (enter, leave) of a value moving from start to end against the range [lower, upper]
+    start = np.asarray(start, dtype=np.float64)
+    delta = np.asarray(end, dtype=np.float64) - start
+    moving = delta != 0
+    divisor = np.where(moving, delta, 1.0)
+    with np.errstate(invalid='ignore'):
+        low = (lower - start) / divisor
+        high = (upper - start) / divisor
+    inside = (lower <= start) & (start <= upper)
+    first = np.where(moving, np.minimum(low, high), np.where(inside, -np.inf, np.inf))
+    last = np.where(moving, np.maximum(low, high), np.where(inside, np.inf, -np.inf))
+    hit = (first <= last) & (first <= 1) & (last >= 0)
+    return np.where(hit, np.maximum(first, 0.0), np.inf), np.where(hit, np.minimum(last, 1.0), -np.inf)
+
+def Touched(enter, leave):
+    # Whether each overlap happened at all during the step
+    return enter <= leave
+
+def Durations(enter, leave):
+    # Fraction of the step each overlap lasted
+    return np.maximum(leave - enter, 0.0)
+
+def Total(fractions):
+    # Sum along the last axis, strictly left to right. Missed overlaps add exact zeros, so a
+    # broad-phase subset sums to the same bits as the full set in index order.
+    if fractions.shape[-1] == 0:
+        return np.zeros(fractions.shape[:-1])
+    return np.cumsum(fractions, axis=-1)[..., -1]
+
+def Coverage(enter, leave):
+    # Fraction of the step covered by the union of the overlaps along the last axis
+    order = np.argsort(enter, axis=-1, kind='stable')
+    enter = np.take_along_axis(enter, order, axis=-1)
+    leave = np.take_along_axis(leave, order, axis=-1)
+    # Each overlap only adds what sticks out past everything that entered before it
+    reach = np.maximum.accumulate(leave, axis=-1)
+    before = np.concatenate([np.zeros(reach.shape[:-1] + (1,)), reach[..., :-1]], axis=-1)
+    return Total(np.maximum(leave - np.maximum(enter, before), 0.0))
@@ -0,0 +1,113 @@
+import numpy as np
+from utils.motion import Travel, Trajectory
+
+# movement_type codes double as the axis index the mover travels along
+HORIZONTAL = 0
+VERTICAL = 1
+MOVEMENT_TYPES = {'horizontal' : HORIZONTAL, 'vertical' : VERTICAL}
+
+# name : (dtype, per-entity shape, default)
+ENTITY_FIELDS = {
+    'position' : (np.float32, (3,), 0.0),
+    'speed' : (np.float32, (), 0.0),
+    'direction' : (np.float32, (), 1.0),  # 1 for up/right, -1 for down/left
+    'bounds' : (np.float32, (2,), 0.0),
+    'travel' : (np.float64, (), 0.0),  # Where the mover was along its back-and-forth path at time 0, see utils/motion.py
+    'movement_type' : (np.int8, (), VERTICAL),
+    'collected' : (np.bool_, (), False),
+    'is_active' : (np.bool_, (), True),
+    'phase_offset' : (np.float32, (), 0.0),
+    'base_y' : (np.float32, (), 0.0),
+    'platform_index' : (np.int32, (), -1),
+}
+
+class EntityStore:
+    # Structure-of-arrays storage: one contiguous array per field, one row per entity
+    def __init__(self):
+        self.count = 0
+        for name, (dtype, shape, default) in ENTITY_FIELDS.items():
+            setattr(self, name, np.full((0,) + shape, default, dtype=dtype))
+
+    def __len__(self):
+        return self.count
+
+    def AddMany(self, positions, **fields):
+        # Append a block of entities in one go. Field values broadcast over the block.
+        positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+        n = len(positions)
+        fields['position'] = positions
+        if 'movement_type' in fields and isinstance(fields['movement_type'], str):
+            fields['movement_type'] = MOVEMENT_TYPES[fields['movement_type']]
+
+        for name, (dtype, shape, default) in ENTITY_FIELDS.items():
+            block = np.empty((n,) + shape, dtype=dtype)
+            block[...] = fields.get(name, default)
+            setattr(self, name, np.concatenate([getattr(self, name), block]))
+
+        first = self.count
+        self.count += n
+        return np.arange(first, self.count)
+
+    def Clear(self):
+        self.__init__()
+
+    def Fields(self):
+        return {name : getattr(self, name) for name in ENTITY_FIELDS}
+
+    def Share(self):
+        # Every field array, frozen read-only so it can be handed out without a copy. The store
+        # keeps using it until Writable() copies it for the next in-place change.
+        fields = self.Fields()
+        for array in fields.values():
+            flags = array.flags
+            if flags.writeable:
+                flags.writeable = False
+        return fields
+
+    def Writable(self, name):
+        # A field array that may be modified in place: a shared (read-only) one is copied first
+        array = getattr(self, name)
+        if not array.flags.writeable:
+            array = np.array(array)
+            setattr(self, name, array)
+        return array
+
+    def SetFields(self, fields, copy=True):
+        # Replace the whole store from a {field name : array} dict (missing fields get defaults).
+        # With copy=False arrays of the right dtype are used as they are, e.g. memory-mapped level data.
+        count = len(fields['position'])
+        for name, (dtype, shape, default) in ENTITY_FIELDS.items():
+            if name in fields:
+                array = np.array(fields[name], dtype=dtype) if copy else np.asarray(fields[name], dtype=dtype)
+                setattr(self, name, array if array.shape == (count,) + shape else array.reshape((count,) + shape))
+            else:
+                setattr(self, name, np.full((count,) + shape, default, dtype=dtype))
+        self.count = count
+
+def ResetTravel(store, time):
+    # Fit every mover's trajectory to its current position and direction at `time`
+    axis_values = store.position[np.arange(store.count), store.movement_type]
+    store.travel = Travel(axis_values, store.direction, store.speed, store.bounds, time)
+
+def MoverPositions(store, time, indices=None):
+    # Positions of the entities at `indices` (default all) at any simulation time. Entities with
+    # no speed aren't movers and keep their stored position.
+    rows = np.arange(store.count) if indices is None else np.asarray(indices)
+    positions = store.position[rows]
+    moving = store.speed[rows] != 0
+    if moving.any():
+        moving_rows = rows[moving]
+        values, _ = Trajectory(store.travel[moving_rows], store.speed[moving_rows], store.bounds[moving_rows], time)
+        positions[np.flatnonzero(moving), store.movement_type[moving_rows]] = values
+    return positions
+
+def UpdateMovers(store, time):
+    # Put every mover where its trajectory is at `time`. Nothing accumulates from step to step,
+    # so the result doesn't depend on dt or on how many steps it took to get here.
+    rows = np.flatnonzero(store.speed)
+    if len(rows) == 0:
+        return
+    values, directions = Trajectory(store.travel[rows], store.speed[rows], store.bounds[rows], time)
+    store.Writable('position')[rows, store.movement_type[rows]] = values
+    if not np.array_equal(directions, store.direction[rows]):  # Turning is rare, keep the table shared until then
+        store.Writable('direction')[rows] = directions
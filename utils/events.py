@@ -0,0 +1,19 @@
+import numpy as np
+
+# Typed state-change events Simulation emits (into Simulation.events), with what their value holds
+KEY_COLLECTED = 1  # Key index
+LIFE_LOST = 2  # Lives left
+RESPAWNED = 3  # Unused (0)
+MAP_ADVANCED = 4  # The map number started
+VICTORY = 5  # Unused (0)
+GAME_OVER = 6  # Unused (0)
+EVENT_NAMES = {
+    KEY_COLLECTED : 'key_collected',
+    LIFE_LOST : 'life_lost',
+    RESPAWNED : 'respawned',
+    MAP_ADVANCED : 'map_advanced',
+    VICTORY : 'victory',
+    GAME_OVER : 'game_over',
+}
+
+EVENT = np.dtype([('tick', '<u8'), ('kind', 'u1'), ('value', '<i4')])
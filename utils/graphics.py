@@ -1,22 +1,56 @@
 import ctypes
 import numpy as np
 import copy
+import traceback
+from collections import OrderedDict
 from OpenGL.GL import *
 from OpenGL.GL.shaders import compileProgram, compileShader
+from utils.transforms import ModelMatrices, Transform, UpdateTransforms
+from utils.meshstore import MeshStore
+
+class ResourceTracker:
+    # Every live GL object, so leaks can be reported. In debug mode the creation site is kept too.
+    def __init__(self):
+        self.debug = False
+        self.live = {}  # (kind, id) -> stack trace of the creation site, or None
+
+    def Created(self, kind, ID):
+        self.live[(kind, int(ID))] = ''.join(traceback.format_stack(limit=8)[:-2]) if self.debug else None
+
+    def Deleted(self, kind, ID):
+        self.live.pop((kind, int(ID)), None)
+
+    def Report(self):
+        if not self.live:
+            return "No live GL resources"
+        lines = [f"{len(self.live)} live GL resources:"]
+        for (kind, ID), stack in self.live.items():
+            lines.append(f"  {kind} {ID}")
+            if stack:
+                lines.append("    " + stack.rstrip().replace("\n", "\n    "))
+        return "\n".join(lines)
+
+GL_RESOURCES = ResourceTracker()
+
+# Interleaved x, y, z, r, g, b float vertices
+VERTEX_BYTES = 6 * ctypes.sizeof(ctypes.c_float)
 
 class VBO:
     def __init__(self, vertices):
         self.ID = glGenBuffers(1)
+        GL_RESOURCES.Created('buffer', self.ID)
         glBindBuffer(GL_ARRAY_BUFFER, self.ID)
         glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
     def Use(self):
         glBindBuffer(GL_ARRAY_BUFFER, self.ID)
     def Delete(self):
         glDeleteBuffers(1, (self.ID,))
+        GL_RESOURCES.Deleted('buffer', self.ID)
 
 class IBO:
     def __init__(self, indices):
         self.ID = glGenBuffers(1)
+        GL_RESOURCES.Created('buffer', self.ID)
         self.count = len(indices)
         glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ID)
         glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
@@ -24,10 +58,12 @@ class IBO:
         glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ID)
     def Delete(self):
         glDeleteBuffers(1, (self.ID,))
+        GL_RESOURCES.Deleted('buffer', self.ID)
 
 class VAO:
     def __init__(self, vbo : VBO):
         self.vao = glGenVertexArrays(1)
+        GL_RESOURCES.Created('vertex array', self.vao)
         glBindVertexArray(self.vao)
         vbo.Use()
         glEnableVertexAttribArray(0)
@@ -38,59 +74,383 @@ class VAO:
         glBindVertexArray(self.vao)
     def Delete(self):
         glDeleteVertexArrays(1, (self.vao,))
+        GL_RESOURCES.Deleted('vertex array', self.vao)
+
+class Mesh:
+    # Geometry uploaded once and drawn any number of times with per-instance model matrices
+    def __init__(self, vertices, indices):
+        self.vbo = VBO(np.asarray(vertices, dtype=np.float32))
+        self.ibo = IBO(np.asarray(indices, dtype=np.uint32))
+        self.vao = VAO(self.vbo)
+        self.instance_vbo = None  # Created by the first instanced draw
+        self.instance_capacity = 0
+        self.references = 0  # Scenes using this mesh; a cache only frees meshes nobody references
+
+    def Acquire(self):
+        self.references += 1
+        return self
+
+    def Release(self):
+        self.references -= 1
+
+    def CreateInstanceBuffer(self):
+        # Per-instance mat4 at locations 2-5, one vec4 column per location, advancing once per instance
+        self.vao.Use()
+        self.instance_vbo = glGenBuffers(1)
+        GL_RESOURCES.Created('buffer', self.instance_vbo)
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        for column in range(4):
+            glEnableVertexAttribArray(2 + column)
+            glVertexAttribPointer(2 + column, 4, GL_FLOAT, GL_FALSE, ctypes.c_uint(16 * ctypes.sizeof(ctypes.c_float)), ctypes.c_void_p(column * 4 * ctypes.sizeof(ctypes.c_float)))
+            glVertexAttribDivisor(2 + column, 1)
+
+    def DrawInstanced(self, shader, model_matrices):
+        count = len(model_matrices)
+        if count == 0:
+            return
+        if self.instance_vbo is None:
+            self.CreateInstanceBuffer()
+
+        # GLSL reads the matrix column by column, so upload each one transposed
+        instance_data = np.ascontiguousarray(np.transpose(model_matrices, (0, 2, 1)), dtype=np.float32)
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        if count > self.instance_capacity:
+            glBufferData(GL_ARRAY_BUFFER, instance_data.nbytes, instance_data, GL_DYNAMIC_DRAW)
+            self.instance_capacity = count
+        else:
+            glBufferSubData(GL_ARRAY_BUFFER, 0, instance_data.nbytes, instance_data)
+
+        shader.Use()
+        self.vao.Use()
+        self.ibo.Use()
+        glDrawElementsInstanced(GL_TRIANGLES, self.ibo.count, GL_UNSIGNED_INT, None, count)
+
+    def Delete(self):
+        if self.instance_vbo is not None:
+            glDeleteBuffers(1, (self.instance_vbo,))
+            GL_RESOURCES.Deleted('buffer', self.instance_vbo)
+            self.instance_vbo = None
+        self.vao.Delete()
+        self.ibo.Delete()
+        self.vbo.Delete()
+
+class MeshCache:
+    # Uploaded meshes keyed by builder and parameters, e.g. Get(CreateLeafPlatform, 24). The arrays come
+    # from a MeshStore (memory, then disk, then the builder); the GPU buffers of the `capacity` most
+    # recently used meshes are kept, so map switches and restarts reuse them instead of re-uploading.
+    # Meshes a scene still references are never freed, the cache grows past capacity instead.
+    def __init__(self, capacity=32, directory=None):
+        self.capacity = capacity
+        self.store = MeshStore(directory)
+        self.meshes = OrderedDict()  # (builder, params) -> Mesh, least recently used first
+    def Get(self, builder, *params):
+        key = (builder, params)
+        mesh = self.meshes.get(key)
+        if mesh is None:
+            mesh = Mesh(*self.store.Get(builder, *params))
+            self.meshes[key] = mesh
+            self.Evict(keep=key)
+        else:
+            self.meshes.move_to_end(key)
+        return mesh
+    def Evict(self, keep=None):
+        # Free least recently used, unreferenced meshes (other than keep, just handed out) until the cache is back within capacity
+        for key in [key for key, mesh in self.meshes.items() if mesh.references == 0 and key != keep]:
+            if len(self.meshes) <= self.capacity:
+                break
+            self.meshes.pop(key).Delete()
+    def Delete(self):
+        for mesh in self.meshes.values():
+            mesh.Delete()
+        self.meshes = OrderedDict()
+
+class StreamBuffer:
+    # Dynamic geometry (vines, debug lines, particles, ...) written fresh every frame into one ring
+    # buffer. Callers queue world-space vertices with Add/Lines; Draw() copies everything queued into
+    # the next free range of the ring and issues one draw call per primitive type and line width.
+    # When the ring is full the storage is orphaned, so the driver never waits for the GPU to finish
+    # reading the ranges written in earlier frames.
+    def __init__(self, capacity=65536):
+        self.capacity = capacity  # In vertices
+        self.offset = 0  # First free vertex of the ring
+        self.pending = {}  # (primitive, line width) -> list of (n, 6) vertex arrays queued this frame
+        self.identity = np.identity(4, dtype=np.float32)
+
+        self.ID = glGenBuffers(1)
+        GL_RESOURCES.Created('buffer', self.ID)
+        glBindBuffer(GL_ARRAY_BUFFER, self.ID)
+        glBufferData(GL_ARRAY_BUFFER, self.capacity * VERTEX_BYTES, None, GL_STREAM_DRAW)
+        self.vao = VAO(self)
+
+    def Use(self):
+        glBindBuffer(GL_ARRAY_BUFFER, self.ID)
+
+    def Add(self, primitive, vertices, line_width=1.0):
+        # vertices: x, y, z, r, g, b rows (or the same values flattened)
+        vertices = np.asarray(vertices, dtype=np.float32).reshape(-1, 6)
+        self.pending.setdefault((primitive, line_width), []).append(vertices)
+
+    def Lines(self, starts, ends, colours, line_width=1.0):
+        # One segment per row of starts/ends; colours broadcast over the segments
+        starts = np.asarray(starts, dtype=np.float32).reshape(-1, 3)
+        vertices = np.empty((len(starts), 2, 6), dtype=np.float32)
+        vertices[:, 0, :3] = starts
+        vertices[:, 1, :3] = np.asarray(ends, dtype=np.float32).reshape(-1, 3)
+        vertices[:, :, 3:] = np.asarray(colours, dtype=np.float32).reshape(-1, 1, 3)
+        self.Add(GL_LINES, vertices.reshape(-1, 6), line_width)
+
+    def Draw(self, shader):
+        if not self.pending:
+            return
+        batches = [(key, np.concatenate(arrays)) for key, arrays in self.pending.items()]
+        self.pending = {}
+        data = np.concatenate([vertices for _, vertices in batches])
+        count = len(data)
+
+        self.Use()
+        if count > self.capacity:
+            # Grow to fit, the old storage is orphaned along with its contents
+            self.capacity = max(count, 2 * self.capacity)
+            self.offset = self.capacity
+        if self.offset + count > self.capacity:
+            glBufferData(GL_ARRAY_BUFFER, self.capacity * VERTEX_BYTES, None, GL_STREAM_DRAW)
+            self.offset = 0
+
+        # Nothing the GPU may still be reading lives in this range, so write it without synchronizing
+        pointer = glMapBufferRange(GL_ARRAY_BUFFER, self.offset * VERTEX_BYTES, data.nbytes, GL_MAP_WRITE_BIT | GL_MAP_INVALIDATE_RANGE_BIT | GL_MAP_UNSYNCHRONIZED_BIT)
+        ctypes.memmove(pointer, data.ctypes.data, data.nbytes)
+        glUnmapBuffer(GL_ARRAY_BUFFER)
+
+        shader.Use()
+        glUniformMatrix4fv(shader.GetUniformLocation("modelMatrix"), 1, GL_TRUE, self.identity)
+        self.vao.Use()
+        first = self.offset
+        for (primitive, line_width), vertices in batches:
+            if line_width != 1.0:
+                glLineWidth(line_width)
+            glDrawArrays(primitive, first, len(vertices))
+            if line_width != 1.0:
+                glLineWidth(1.0)
+            first += len(vertices)
+        self.offset += count
+
+    def Delete(self):
+        self.vao.Delete()
+        glDeleteBuffers(1, (self.ID,))
+        GL_RESOURCES.Deleted('buffer', self.ID)
+
+class StaticBatch:
+    # Geometry that rarely moves, pre-transformed into world space and merged into one vertex and index
+    # buffer so it all draws with a single call. Each group is one mesh placed by a stack of model
+    # matrices; Set() compares against the previous frame and only re-transforms and re-uploads the
+    # instances that moved or changed visibility. Hidden instances are collapsed to a point rather than
+    # removed, so only adding/removing instances or groups rebuilds the buffers. Groups are ordered
+    # front to back (highest z first), which keeps z layering correct where depths tie.
+    def __init__(self, shader):
+        self.shader = shader
+        self.groups = {}  # name -> dict(vertices, indices, matrices, visible)
+        self.order = []  # Group names in buffer order
+        self.vertices = np.zeros((0, 6), dtype=np.float32)  # CPU copy of the merged vertex buffer
+        self.first = {}  # Group name -> first vertex in the merged buffer
+        self.index_count = 0
+        self.rebuild = True
+        self.dirty = None  # [first, last) vertex range to re-upload
+        self.identity = np.identity(4, dtype=np.float32)
+
+        self.ID = glGenBuffers(1)
+        GL_RESOURCES.Created('buffer', self.ID)
+        self.ibo_ID = glGenBuffers(1)
+        GL_RESOURCES.Created('buffer', self.ibo_ID)
+        self.Use()
+        self.vao = VAO(self)
+
+    def Use(self):
+        glBindBuffer(GL_ARRAY_BUFFER, self.ID)
+
+    def Set(self, name, vertices, indices, matrices, visible=None):
+        # vertices/indices: the group's mesh; matrices: (n, 4, 4) placements; visible: (n,) bools
+        matrices = np.asarray(matrices, dtype=np.float32).reshape(-1, 4, 4)
+        visible = np.ones(len(matrices), dtype=np.bool_) if visible is None else np.asarray(visible, dtype=np.bool_)
+        group = self.groups.get(name)
+        if group is None or group['vertices'] is not vertices or len(group['matrices']) != len(matrices):
+            self.groups[name] = {'vertices' : vertices, 'indices' : indices, 'matrices' : matrices.copy(), 'visible' : visible.copy()}
+            self.rebuild = True
+            return
+        if self.rebuild:
+            group['matrices'][:] = matrices
+            group['visible'][:] = visible
+            return
+
+        changed = np.flatnonzero((group['matrices'] != matrices).any(axis=(1, 2)) | (group['visible'] != visible))
+        if len(changed) == 0:
+            return
+        group['matrices'][changed] = matrices[changed]
+        group['visible'][changed] = visible[changed]
+        mesh_size = len(vertices) // 6
+        first = self.first[name] + int(changed[0]) * mesh_size
+        last = self.first[name] + (int(changed[-1]) + 1) * mesh_size
+        self.vertices[first:last] = self.Transform(group, np.arange(changed[0], changed[-1] + 1)).reshape(-1, 6)
+        self.dirty = (first, last) if self.dirty is None else (min(first, self.dirty[0]), max(last, self.dirty[1]))
+
+    def Transform(self, group, instances):
+        # World-space vertices of the given instances, (len(instances), mesh vertices, 6)
+        mesh = np.asarray(group['vertices'], dtype=np.float32).reshape(-1, 6)
+        matrices = group['matrices'][instances]
+        vertices = np.empty((len(instances), len(mesh), 6), dtype=np.float32)
+        vertices[:, :, :3] = np.einsum('kij,vj->kvi', matrices[:, :3, :3], mesh[:, :3]) + matrices[:, None, :3, 3]
+        vertices[:, :, 3:] = mesh[:, 3:]
+        hidden = ~group['visible'][instances]
+        vertices[hidden, :, :3] = vertices[hidden, :1, :3]  # Collapse to one point: no fragments
+        return vertices
+
+    def Rebuild(self):
+        def FrontZ(name):
+            group = self.groups[name]
+            mesh_z = np.asarray(group['vertices'], dtype=np.float32).reshape(-1, 6)[:, 2].max(initial=0.0)
+            return mesh_z + (group['matrices'][:, 2, 3].max() if len(group['matrices']) else 0.0)
+        self.order = sorted(self.groups, key=FrontZ, reverse=True)
+
+        vertices = []
+        indices = []
+        count = 0
+        self.first = {}
+        for name in self.order:
+            group = self.groups[name]
+            n = len(group['matrices'])
+            mesh_size = len(group['vertices']) // 6
+            self.first[name] = count
+            vertices.append(self.Transform(group, np.arange(n)).reshape(-1, 6))
+            offsets = count + mesh_size * np.arange(n, dtype=np.uint32)
+            indices.append((np.asarray(group['indices'], dtype=np.uint32)[None, :] + offsets[:, None]).reshape(-1))
+            count += n * mesh_size
+        self.vertices = np.concatenate(vertices) if vertices else np.zeros((0, 6), dtype=np.float32)
+        index_data = np.concatenate(indices) if indices else np.zeros(0, dtype=np.uint32)
+        self.index_count = len(index_data)
+
+        self.Use()
+        glBufferData(GL_ARRAY_BUFFER, self.vertices.nbytes, self.vertices, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ibo_ID)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, index_data.nbytes, index_data, GL_STATIC_DRAW)
+        self.rebuild = False
+        self.dirty = None
+
+    def Draw(self):
+        if self.rebuild:
+            self.Rebuild()
+        elif self.dirty is not None:
+            first, last = self.dirty
+            self.Use()
+            glBufferSubData(GL_ARRAY_BUFFER, first * VERTEX_BYTES, (last - first) * VERTEX_BYTES, self.vertices[first:last])
+            self.dirty = None
+        if self.index_count == 0:
+            return
+
+        self.shader.Use()
+        glUniformMatrix4fv(self.shader.GetUniformLocation("modelMatrix"), 1, GL_TRUE, self.identity)
+        self.vao.Use()
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ibo_ID)
+        glDrawElements(GL_TRIANGLES, self.index_count, GL_UNSIGNED_INT, None)
+
+    def Clear(self):
+        self.groups = {}
+        self.rebuild = True
+
+    def Delete(self):
+        self.vao.Delete()
+        glDeleteBuffers(1, (self.ID,))
+        GL_RESOURCES.Deleted('buffer', self.ID)
+        glDeleteBuffers(1, (self.ibo_ID,))
+        GL_RESOURCES.Deleted('buffer', self.ibo_ID)
 
 class Shader:
     def __init__(self, vertex_shader, fragment_shader):
         self.ID = compileProgram(compileShader(vertex_shader, GL_VERTEX_SHADER), compileShader(fragment_shader, GL_FRAGMENT_SHADER))
+        GL_RESOURCES.Created('program', self.ID)
         self.Use()
+
+        # Resolve every active uniform once, at link time
+        self.uniforms = {}
+        for i in range(glGetProgramiv(self.ID, GL_ACTIVE_UNIFORMS)):
+            name = glGetActiveUniform(self.ID, i)[0].decode('utf-8')
+            self.uniforms[name] = glGetUniformLocation(self.ID, name.encode('utf-8'))
+    def GetUniformLocation(self, name):
+        # Names that aren't active uniforms are looked up once and cached too (as -1)
+        if name not in self.uniforms:
+            self.uniforms[name] = glGetUniformLocation(self.ID, name.encode('utf-8'))
+        return self.uniforms[name]
     def Use(self):
         glUseProgram(self.ID)
     def Delete(self):
-        glDeleteProgram((self.ID,))
+        glDeleteProgram(self.ID)
+        GL_RESOURCES.Deleted('program', self.ID)
 
 class Camera:
     def __init__(self, height, width):
         self.height = height
         self.width = width
-    def Update(self, shader):
-        shader.Use()
+        self.camMatrix = np.array([[2.0/self.width, 0,0,0],[0,2.0/self.height,0,0],[0,0,-1/100,0],[0,0,0,1]], dtype = np.float32)
+        self.position = np.zeros(2, dtype=np.float32)  # World point at the centre of the viewport
+        self.version = 0
+        self.uploaded = {}  # shader ID -> version of camMatrix it already holds
 
-        camMatrix = np.array([[2.0/self.width, 0,0,0],[0,2.0/self.height,0,0],[0,0,-1/100,0],[0,0,0,1]], dtype = np.float32)
+    def Follow(self, target, world_min, world_max):
+        # Centre the view on the target without showing anything past the world's edges.
+        # Along an axis where the world is smaller than the view, the world stays centred.
+        half = np.array([self.width, self.height], dtype=np.float32) / 2
+        lo = np.asarray(world_min, dtype=np.float32) + half
+        hi = np.asarray(world_max, dtype=np.float32) - half
+        position = np.where(lo <= hi, np.clip(np.asarray(target, dtype=np.float32)[:2], lo, hi), (lo + hi) / 2)
+        if not np.array_equal(position, self.position):
+            self.position = position.astype(np.float32)
+            self.camMatrix[0, 3] = -self.position[0] * 2.0 / self.width
+            self.camMatrix[1, 3] = -self.position[1] * 2.0 / self.height
+            self.version += 1
 
-        camMatrixLocation = glGetUniformLocation(shader.ID, "camMatrix".encode('utf-8'))
-        glUniformMatrix4fv(camMatrixLocation, 1, GL_TRUE, camMatrix)
+    def View(self, margin=0.0):
+        # World-space (lo, hi) corners of the visible area, grown by margin on every side
+        half = np.array([self.width, self.height], dtype=np.float32) / 2 + margin
+        return self.position - half, self.position + half
 
+    def Visible(self, grid, positions, radius):
+        # Indices of the entities whose bounding circle overlaps the view. The grid narrows the
+        # search to the cells under the view, so the cost follows what's on screen, not level size.
+        lo, hi = self.View(radius)
+        candidates = grid.InRect(lo, hi)
+        xy = positions[candidates, :2]
+        inside = ((xy >= lo) & (xy <= hi)).all(axis=1)
+        return np.sort(candidates[inside])
+    def Update(self, shader):
+        shader.Use()
 
+        # Uniform values stay with the program, so only upload when the matrix changed
+        if self.uploaded.get(shader.ID) != self.version:
+            glUniformMatrix4fv(shader.GetUniformLocation("camMatrix"), 1, GL_TRUE, self.camMatrix)
+            self.uploaded[shader.ID] = self.version
 
 class Object:
-    def __init__(self, shader, properties):
-        self.properties = copy.deepcopy(properties)
+    def __init__(self, shader, properties, mesh=None):
+        # Geometry comes from a shared (cached) mesh when given, otherwise it's uploaded from the properties
+        self.properties = copy.deepcopy({name : value for name, value in properties.items() if name not in ('vertices', 'indices')})
+        self.owns_mesh = mesh is None
+        if mesh is None:
+            mesh = Mesh(properties['vertices'], properties['indices'])
+        self.mesh = mesh
+        self.vbo = mesh.vbo
+        self.ibo = mesh.ibo
+        self.vao = mesh.vao
 
-        self.vbo = VBO(self.properties['vertices'])
-        self.ibo = IBO(self.properties['indices'])
-        self.vao = VAO(self.vbo)
-
-        self.properties.pop('vertices')
-        self.properties.pop('indices')
+        # Position, rotation and scale live in the transform so the model matrix can be cached
+        self.transform = Transform(self.properties.pop('position'), self.properties.pop('rotation_z'), self.properties.pop('scale'))
 
         # Create shaders
         self.shader = shader
 
     def Draw(self):
-
-        position = self.properties['position']
-        rotation_z = self.properties['rotation_z']
-        scale = self.properties['scale']
-
-        translation_matrix = np.array([[1,0,0, position[0]],[0,1,0, position[1]],[0,0,1, position[2]],[0,0,0,1]], dtype = np.float32)
-        rotation_z_matrix = np.array([[np.cos(rotation_z), -np.sin(rotation_z),0, 0],[np.sin(rotation_z), np.cos(rotation_z), 0, 0],[0,0,1,0],[0,0,0,1]], dtype = np.float32)
-        scale_matrix = np.array([[scale[0], 0,0,0],[0,scale[1],0,0],[0,0,scale[2],0],[0,0,0,1]], dtype = np.float32)
-        model_matrix = translation_matrix @ rotation_z_matrix @ scale_matrix
+        model_matrix = self.transform.Matrix()
 
         # Bind the shader, set uniforms, bind vao (automatically binds vbo) and ibo
         self.shader.Use()
-        modelMatrixLocation = glGetUniformLocation(self.shader.ID, "modelMatrix".encode('utf-8'))
-        glUniformMatrix4fv(modelMatrixLocation, 1, GL_TRUE, model_matrix)
+        glUniformMatrix4fv(self.shader.GetUniformLocation("modelMatrix"), 1, GL_TRUE, model_matrix)
         
 
         self.vao.Use()
@@ -100,4 +460,29 @@ class Object:
         if self.ibo.count == 2:
             glDrawElements(GL_LINES, self.ibo.count, GL_UNSIGNED_INT, None)
         else:
-            glDrawElements(GL_TRIANGLES, self.ibo.count, GL_UNSIGNED_INT, None)
\ No newline at end of file
+            glDrawElements(GL_TRIANGLES, self.ibo.count, GL_UNSIGNED_INT, None)
+
+    def Delete(self):
+        # Shared meshes belong to their cache, only free geometry this object uploaded itself
+        if self.owns_mesh:
+            self.mesh.Delete()
+
+class Scene:
+    # Arena for one scene's GPU resources: every mesh the scene uses stays referenced until Teardown(),
+    # after which the cache may free or reuse it
+    def __init__(self, meshes):
+        self.meshes = meshes
+        self.used = {}  # (builder, params) -> Mesh
+    def Mesh(self, builder, *params):
+        key = (builder, params)
+        mesh = self.used.get(key)
+        if mesh is None:
+            mesh = self.used[key] = self.meshes.Get(builder, *params).Acquire()
+        return mesh
+    def Object(self, shader, properties, builder, *params):
+        return Object(shader, properties, self.Mesh(builder, *params))
+    def Teardown(self):
+        for mesh in self.used.values():
+            mesh.Release()
+        self.used = {}
+        self.meshes.Evict()
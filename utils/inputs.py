@@ -0,0 +1,31 @@
+# Keys the game reads, in bit order. An input mask is an int with bit i set while KEYS[i] is down.
+KEYS = ("1", "2", "W", "A", "S", "D", "SPACE", "F", "E")
+BITS = {key : 1 << i for i, key in enumerate(KEYS)}
+KEY_1, KEY_2, KEY_W, KEY_A, KEY_S, KEY_D, KEY_SPACE, KEY_F, KEY_E = (BITS[key] for key in KEYS)
+
+class InputState:
+    # Keyboard state as bitmasks, fed by key events and advanced once per frame.
+    #   held     : keys down this frame
+    #   pressed  : keys that went down since the last frame
+    #   released : keys held last frame that are up now
+    def __init__(self):
+        self.held = 0
+        self.pressed = 0
+        self.released = 0
+        self.down = 0  # Live key state between frames
+        self.tapped = 0  # Keys that went down since the last frame, even if already released again
+
+    def KeyEvent(self, bit, is_down):
+        if is_down:
+            self.down |= bit
+            self.tapped |= bit
+        else:
+            self.down &= ~bit
+
+    def NextFrame(self):
+        # A key pressed and released between two frames still counts as held for one frame
+        held = self.down | self.tapped
+        self.pressed = self.tapped
+        self.released = self.held & ~held
+        self.held = held
+        self.tapped = 0
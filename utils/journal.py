@@ -0,0 +1,90 @@
+import bisect
+import numpy as np
+from utils.simulation import Simulation
+from utils.events import EVENT
+
+class Journal:
+    # Event-sourced history of the recent part of a simulation session. A full state snapshot is
+    # taken every snapshot_interval ticks, and every tick in between is kept as the delta that
+    # produced it: its (input bitmask, dt). The simulation is deterministic, so any tick is rebuilt
+    # by loading the nearest snapshot at or before it and stepping the deltas since, at most
+    # snapshot_interval - 1 of them. The typed events the simulation emitted are kept alongside,
+    # stamped with the tick that emitted them.
+    # Only the last `window` ticks (at least) are kept, so a session of any length uses bounded
+    # memory. Tick n is the state after n Step() calls since the journal started.
+    def __init__(self, sim, snapshot_interval=30, window=120 * 60 * 2):
+        self.snapshot_interval = snapshot_interval
+        self.window = window
+        self.layouts = dict(sim.layouts)
+        self.first_input = 0  # Tick the first kept input led to, minus one
+        self.inputs = []  # (mask, dt) of every kept tick
+        self.events = []  # (tick, kind, value)
+        self.snapshot_ticks = []
+        self.snapshots = []
+        sim.events.clear()
+        self.Snapshot(sim)
+
+    @property
+    def ticks(self):
+        return self.first_input + len(self.inputs)
+
+    @property
+    def first_tick(self):
+        # Oldest tick that can still be rebuilt
+        return self.snapshot_ticks[0]
+
+    def Snapshot(self, sim):
+        self.snapshot_ticks.append(self.ticks)
+        self.snapshots.append(sim.Capture())
+        # Forget the oldest snapshot, and everything only it could rebuild, once the next one
+        # alone still covers the window
+        if len(self.snapshot_ticks) > 1 and self.ticks - self.snapshot_ticks[1] >= self.window:
+            del self.snapshot_ticks[0]
+            del self.snapshots[0]
+            del self.inputs[:self.first_tick - self.first_input]
+            self.first_input = self.first_tick
+            self.events = [event for event in self.events if event[0] > self.first_tick]
+
+    def Record(self, sim, mask, dt):
+        # Log the tick sim just stepped with (mask, dt). Returns the events it emitted.
+        self.inputs.append((mask, dt))
+        events = [(self.ticks, kind, value) for kind, value in sim.events]
+        sim.events.clear()
+        self.events.extend(events)
+        if self.ticks % self.snapshot_interval == 0:
+            self.Snapshot(sim)
+        return events
+
+    def CheckTick(self, tick):
+        if not self.first_tick <= tick <= self.ticks:
+            raise IndexError(f"Tick {tick} is outside the journal ({self.first_tick} to {self.ticks})")
+
+    def Reconstruct(self, tick, sim=None):
+        # Simulation in the state it had at `tick`
+        self.CheckTick(tick)
+        if sim is None:
+            sim = Simulation()
+            sim.layouts = dict(self.layouts)
+        index = bisect.bisect_right(self.snapshot_ticks, tick) - 1
+        sim.Restore(self.snapshots[index])
+        for mask, dt in self.inputs[self.snapshot_ticks[index] - self.first_input:tick - self.first_input]:
+            sim.Step(mask, dt)
+        sim.events.clear()
+        return sim
+
+    def Truncate(self, tick):
+        # Forget everything after `tick`, e.g. to roll back and carry on from there
+        self.CheckTick(tick)
+        del self.inputs[tick - self.first_input:]
+        self.events = [event for event in self.events if event[0] <= tick]
+        keep = bisect.bisect_right(self.snapshot_ticks, tick)
+        del self.snapshot_ticks[keep:]
+        del self.snapshots[keep:]
+
+    def Events(self, kind=None, start=0, end=None):
+        # Kept events stamped with ticks in [start, end] as an EVENT array, optionally of one kind
+        events = np.array(self.events, dtype=EVENT)
+        keep = (events['tick'] >= start) & (events['tick'] <= (self.ticks if end is None else end))
+        if kind is not None:
+            keep &= events['kind'] == kind
+        return events[keep]
@@ -0,0 +1,127 @@
+import heapq
+import numpy as np
+
+BANK = -1  # Route target for the final swing onto the right bank
+
+class LeafGraph:
+    # Where a vine swing lands, and when, for a map 2 layout. Every leaf is active for `interval`
+    # seconds out of each 2 * interval, so the set of active leaves (and with it the nearest active
+    # leaf from any spot) only changes at the leaf toggle times. Those split the period into windows;
+    # the edges from a leaf are the runs of windows in which a swing from it lands on the same leaf.
+    # Times are simulation time (Simulation.time); a swing "at t" is the E press that sees the
+    # leaves as UpdateLeaves left them at t, i.e. the one passed to the Step() that starts with
+    # Simulation.time at t.
+    def __init__(self, positions, phase_offsets, interval, vine_range, rise, key_positions, key_radius, bank_x, vine_duration):
+        self.period = 2.0 * interval
+        self.vine_range = vine_range
+        self.vine_duration = vine_duration
+        self.bank_x = bank_x
+        # Active leaves are raised, and the player lands on (and stays at) the raised position
+        self.positions = np.asarray(positions, dtype=np.float64)[:, :2] + [0.0, rise]
+        self.key_positions = np.asarray(key_positions, dtype=np.float64).reshape(-1, 3)[:, :2]
+        self.key_radius = key_radius
+
+        # Window boundaries within one period: every time a leaf turns on or off
+        phase_offsets = np.asarray(phase_offsets, dtype=np.float64)
+        toggles = np.concatenate([-phase_offsets, interval - phase_offsets]) % self.period
+        bounds = np.unique(np.concatenate([[0.0, self.period], toggles]))
+        self.starts = bounds[:-1]
+        self.ends = bounds[1:]
+        # Activity of every leaf in every window, sampled mid-window like UpdateLeaves would
+        middles = (self.starts + self.ends) / 2
+        self.active = ((middles[:, None] + phase_offsets) % self.period) < interval  # (windows, leaves)
+
+        # edges[i]: (starts, ends, targets) of the swings from leaf i
+        self.edges = [self.Runs(self.Targets(position)) for position in self.positions]
+        self.leaf_keys = np.array([self.KeysAt(position) for position in self.positions], dtype=np.int64)
+
+    def Targets(self, point):
+        # Leaf a swing from `point` lands on in each window: the nearest active leaf within vine range,
+        # skipping one the player is standing on
+        distances = np.hypot(*(self.positions - point[:2]).T)
+        near = np.flatnonzero((distances >= 1) & (distances < self.vine_range))
+        near = near[np.argsort(distances[near], kind='stable')]
+        if len(near) == 0:
+            return np.full(len(self.starts), -1, dtype=np.int64)
+        active = self.active[:, near]
+        return np.where(active.any(axis=1), near[active.argmax(axis=1)], -1)
+
+    def KeysAt(self, point):
+        # Bitmask of the keys collected by standing at `point`
+        distances = np.hypot(*(self.key_positions - point[:2]).T)
+        return int(np.sum(1 << np.flatnonzero(distances < self.key_radius)))
+
+    def Runs(self, targets):
+        # Merge consecutive windows with the same target into (starts, ends, targets) runs, without
+        # the ones where nothing is in range. A run that wraps around the end of the period ends
+        # past it; a target that never changes gets an endless run.
+        change = np.flatnonzero(np.diff(targets)) + 1
+        first = np.concatenate([[0], change])
+        starts = self.starts[first]
+        ends = np.append(self.starts[change], self.period)
+        targets = targets[first]
+        if len(targets) == 1:
+            ends[0] = np.inf
+        elif targets[0] == targets[-1]:
+            ends[-1] = self.period + ends[0]
+            starts, ends, targets = starts[1:], ends[1:], targets[1:]
+        keep = targets >= 0
+        return starts[keep], ends[keep], targets[keep]
+
+    def Edges(self, leaf):
+        # Time-windowed edges from a leaf as (start, end, target), repeating every period
+        return [(float(start), float(end), int(target)) for start, end, target in zip(*self.edges[leaf])]
+
+    def Departures(self, time, starts, ends, margin=0.0):
+        # Earliest time at or after `time` inside each periodic [start, end), at least margin clear
+        # of both ends. inf where a run is too short for that.
+        length = ends - starts - 2 * margin
+        late = (time - starts - margin) % self.period
+        departures = np.where(late < length, time, time + self.period - late)
+        return np.where(length > 0, departures, np.inf)
+
+    def Route(self, point, time, collected, ready=None, tick=0.0):
+        # Earliest-arrival swings from `point` at `time` to the right bank, as [(time, leaf or BANK)],
+        # or None when the bank can't be reached by swinging. collected: bool per key already held.
+        # ready is when the next swing is allowed (after a vine still in progress). With the
+        # simulation's tick length, every swing keeps a tick clear of leaf toggles and the vine
+        # cooldown, so pressing E in the first Step() that starts (Simulation.time before stepping)
+        # at or after each time follows the route exactly.
+        all_keys = (1 << len(self.key_positions)) - 1
+        start = len(self.positions)  # Node for the starting point
+        start_edges = self.Runs(self.Targets(np.asarray(point, dtype=np.float64)))
+        mask = int(np.sum(1 << np.flatnonzero(collected))) | self.KeysAt(np.asarray(point, dtype=np.float64))
+
+        heap = [(time, start, mask)]
+        previous = {(start, mask) : None}
+        arrival = {(start, mask) : time}
+        done = set()
+        while heap:
+            t, node, mask = heapq.heappop(heap)
+            if (node, mask) in done:
+                continue
+            done.add((node, mask))
+
+            x = point[0] if node == start else self.positions[node, 0]
+            earliest = (time if ready is None else max(time, ready)) if node == start else t + self.vine_duration + 2 * tick
+            if mask == all_keys and x >= self.bank_x:
+                # With every key, the swing from here always goes to the bank
+                route = [(earliest, BANK)]
+                state = (node, mask)
+                while previous[state] is not None:
+                    route.append((arrival[state], state[0]))
+                    state = previous[state]
+                return route[::-1]
+
+            starts, ends, targets = start_edges if node == start else self.edges[node]
+            departures = self.Departures(earliest, starts, ends, tick)
+            for target in np.unique(targets):
+                departure = float(departures[targets == target].min())
+                if departure == np.inf:
+                    continue
+                state = (int(target), mask | int(self.leaf_keys[target]))
+                if state not in done and departure < arrival.get(state, np.inf):
+                    arrival[state] = departure
+                    previous[state] = (node, mask)
+                    heapq.heappush(heap, (departure, *state))
+        return None
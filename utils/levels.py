@@ -0,0 +1,108 @@
+import os
+import struct
+import numpy as np
+from utils.entities import ENTITY_FIELDS
+
+# Level file layout:
+#   header    : magic, version, map number, entry count, leaf toggle interval the phases were built for, player start,
+#               world extent (x min, x max, y min, y max) and bank width
+#   directory : one entry per (table, field): dtype, entity count, offset of the array in the file
+#   arrays    : every field of every table as its own contiguous, 64-byte aligned array
+# The whole file is memory-mapped copy-on-write and every field is a view into that one mapping,
+# so loading costs nothing up front and the simulation can still modify what it was given.
+MAGIC = b'PLVL'
+VERSION = 2
+HEADERS = {1 : struct.Struct('<4sHHIf3f'), 2 : struct.Struct('<4sHHIf3f4ff')}
+HEADER = HEADERS[VERSION]
+V1_WORLD = (-500.0, 500.0, -500.0, 500.0, 100.0)  # Every version 1 level was built for this world
+ENTRY = struct.Struct('<16s16s8sIQ')  # table, field, dtype, count, offset
+ALIGNMENT = 64
+
+LEVEL_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets', 'levels')
+
+class LevelFormatError(Exception):
+    pass
+
+class Level:
+    def __init__(self, map_number, player_start, leaf_toggle_interval, world_extent, bank_width, tables):
+        self.map_number = map_number
+        self.player_start = player_start
+        self.leaf_toggle_interval = leaf_toggle_interval
+        self.world_extent = world_extent
+        self.bank_width = bank_width
+        self.tables = tables  # table name -> {field name : array}
+
+def LevelPath(map_number):
+    return os.path.join(LEVEL_DIRECTORY, f"map{map_number}.lvl")
+
+def Align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def WriteLevel(path, map_number, tables, player_start, leaf_toggle_interval, world_extent, bank_width):
+    # tables: table name -> EntityStore (or anything with Fields())
+    entries = []
+    offset = Align(HEADER.size + ENTRY.size * len(tables) * len(ENTITY_FIELDS))
+    for table, store in tables.items():
+        for field, array in store.Fields().items():
+            array = np.ascontiguousarray(array, dtype=np.dtype(ENTITY_FIELDS[field][0]).newbyteorder('<'))
+            entries.append((table, field, array, offset))
+            offset = Align(offset + array.nbytes)
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, map_number, len(entries), leaf_toggle_interval, *player_start, *world_extent, bank_width))
+        for table, field, array, array_offset in entries:
+            f.write(ENTRY.pack(table.encode('ascii'), field.encode('ascii'), array.dtype.str.encode('ascii'), len(array), array_offset))
+        for table, field, array, array_offset in entries:
+            f.seek(array_offset)
+            f.write(array.tobytes())
+        f.truncate(max(offset, f.tell()))
+
+def LoadLevel(path):
+    raw = np.memmap(path, dtype=np.uint8, mode='c')
+    if len(raw) < HEADERS[1].size:
+        raise LevelFormatError("Level file is truncated")
+    magic, version = struct.unpack_from('<4sH', raw, 0)
+    if magic != MAGIC:
+        raise LevelFormatError("Not a level file")
+    if version > VERSION:
+        raise LevelFormatError(f"Level file version {version} is newer than supported version {VERSION}")
+    header = HEADERS[version]
+    if len(raw) < header.size:
+        raise LevelFormatError("Level file is truncated")
+    values = header.unpack_from(raw, 0)
+    map_number, n_entries, leaf_toggle_interval = values[2:5]
+    player_start = values[5:8]
+    world = values[8:] if version >= 2 else V1_WORLD
+
+    tables = {}
+    for i in range(n_entries):
+        table, field, dtype, count, offset = ENTRY.unpack_from(raw, header.size + i * ENTRY.size)
+        table = table.rstrip(b'\0').decode('ascii')
+        field = field.rstrip(b'\0').decode('ascii')
+        dtype = np.dtype(dtype.rstrip(b'\0').decode('ascii'))
+        shape = (count,) + ENTITY_FIELDS[field][1]
+        nbytes = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+        if offset + nbytes > len(raw):
+            raise LevelFormatError("Level file is truncated")
+        # A view into the shared mapping: no copy until the simulation writes to it
+        tables.setdefault(table, {})[field] = raw[offset:offset + nbytes].view(dtype).reshape(shape)
+
+    return Level(map_number, np.array(player_start, dtype=np.float32), leaf_toggle_interval,
+                 np.array(world[:4], dtype=np.float32), float(world[4]), tables)
+
+def BuildLevelFiles():
+    # Regenerate assets/levels/*.lvl from the layout dicts in assets/maps/maps.py
+    from assets.maps.maps import map1Layout, map2Layout, map1LongLayout
+    from utils.simulation import Simulation, ENTITY_STORES
+
+    for map_number, layout, path in ((1, map1Layout, LevelPath(1)), (2, map2Layout, LevelPath(2)),
+                                     (1, map1LongLayout, os.path.join(LEVEL_DIRECTORY, "map1_long.lvl"))):
+        sim = Simulation()
+        sim.layouts[map_number] = layout
+        sim.InitMap(map_number)
+        tables = {name : getattr(sim, name) for name in ENTITY_STORES}
+        WriteLevel(path, map_number, tables, layout['player_start'], sim.leaf_toggle_interval, sim.world_extent, sim.bank_width)
+        print(f"Wrote {path}")
+
+if __name__ == "__main__":
+    BuildLevelFiles()
@@ -0,0 +1,86 @@
+import hashlib
+import inspect
+import os
+import sys
+import tempfile
+import zipfile
+import numpy as np
+
+# Next to the package, wherever the game is started from
+MESH_CACHE_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'mesh_cache')
+MESH_FORMAT = 1  # Bump when the stored arrays change meaning, to drop every cached mesh
+
+SOURCE_HASHES = {}  # Module source path -> sha1 of its contents
+
+def SourceHash(module_name):
+    # Hash of the whole source file of a module. Builders call helpers from their own module
+    # (Vertices, Fan, RadialFan, Merge, ...), so hashing the file covers those too.
+    path = inspect.getsourcefile(sys.modules[module_name])
+    if path not in SOURCE_HASHES:
+        with open(path, 'rb') as f:
+            SOURCE_HASHES[path] = hashlib.sha1(f.read()).hexdigest()
+    return SOURCE_HASHES[path]
+
+def MeshKey(builder, params):
+    # Content hash of a generated mesh: the format version, the builder's identity, the source of
+    # the module it lives in and every argument it runs with, defaults included. Editing a builder,
+    # a helper next to it or a default invalidates everything generated before.
+    arguments = inspect.signature(builder).bind(*params)
+    arguments.apply_defaults()
+    digest = hashlib.sha1()
+    digest.update(f"{MESH_FORMAT}:{builder.__module__}.{builder.__qualname__}{tuple(arguments.arguments.items())!r}".encode('utf-8'))
+    digest.update(SourceHash(builder.__module__).encode('ascii'))
+    return digest.hexdigest()
+
+class MeshStore:
+    # Pre-built (vertices, indices) arrays, kept in memory and in a directory of .npz files so later
+    # runs skip the builders entirely. directory=None keeps them in memory only.
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.writable = directory is not None  # Cleared once a write fails, e.g. a read-only install
+        self.arrays = {}  # hash -> (vertices, indices)
+
+    def Path(self, key):
+        return os.path.join(self.directory, key + ".npz")
+
+    def Get(self, builder, *params):
+        key = MeshKey(builder, params)
+        if key in self.arrays:
+            return self.arrays[key]
+
+        arrays = self.Load(key)
+        if arrays is None:
+            vertices, indices = builder(*params)
+            arrays = (np.asarray(vertices, dtype=np.float32), np.asarray(indices, dtype=np.uint32))
+            self.Save(key, arrays)
+        self.arrays[key] = arrays
+        return arrays
+
+    def Load(self, key):
+        if self.directory is None or not os.path.exists(self.Path(key)):
+            return None
+        try:
+            with np.load(self.Path(key)) as data:
+                return data['vertices'], data['indices']
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            return None  # Unreadable entry, rebuild it
+
+    def Save(self, key, arrays):
+        # The disk copy is only a cache: if it can't be written the mesh stays in memory and
+        # later meshes aren't written either
+        if not self.writable:
+            return
+        temporary = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Write to a temporary file first so a crash or a full disk never leaves a partial entry
+            # under the real name
+            handle, temporary = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+            with os.fdopen(handle, 'wb') as f:
+                np.savez(f, vertices=arrays[0], indices=arrays[1])
+            os.replace(temporary, self.Path(key))
+        except OSError as e:
+            print(f"Mesh cache disabled, can't write to {self.directory}: {e}")
+            self.writable = False
+            if temporary is not None and os.path.exists(temporary):
+                os.remove(temporary)
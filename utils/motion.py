@@ -0,0 +1,30 @@
+import numpy as np
+
+# Movers go back and forth along one axis between their bounds at a constant speed, so where a
+# mover is along that axis is a triangle wave of time. A mover's wave is pinned down by its
+# "travel": how far along one full lap (up to the upper bound and back, 2 * span) it was at
+# time 0. Its position at any time then follows in closed form, for any number of movers at once.
+# Everything here broadcasts, so a (worlds, 1) time evaluates every world's movers together.
+
+def Span(bounds):
+    # Lower bound and length of each mover's path, in float64
+    lower = bounds[..., 0].astype(np.float64)
+    return lower, bounds[..., 1] - lower
+
+def Travel(values, directions, speeds, bounds, time):
+    # Travel of movers that are at `values` heading `directions` at `time`.
+    # Values outside the bounds are treated as being on the nearest one.
+    lower, span = Span(bounds)
+    offset = np.clip(values - lower, 0.0, span)
+    lap = np.where(span > 0, 2 * span, 1.0)
+    travel = np.where(directions > 0, offset, 2 * span - offset) - speeds.astype(np.float64) * time
+    return np.where(span > 0, travel % lap, 0.0)
+
+def Trajectory(travel, speeds, bounds, time):
+    # (values, directions) of movers at `time`. Movers without room to move sit on their lower bound.
+    lower, span = Span(bounds)
+    lap = np.where(span > 0, 2 * span, 1.0)
+    wave = (travel + speeds.astype(np.float64) * time) % lap
+    values = np.where(span > 0, lower + span - np.abs(wave - span), lower)
+    directions = np.where(wave < span, 1.0, -1.0)
+    return values, directions
@@ -0,0 +1,168 @@
+import time
+import numpy as np
+
+class NullScope:
+    # What Profiler.Scope hands out while profiling is off: entering and leaving it does nothing
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_SCOPE = NullScope()
+
+class Scope:
+    __slots__ = ('profiler', 'column', 'start')
+
+    def __init__(self, profiler, column):
+        self.profiler = profiler
+        self.column = column
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        profiler = self.profiler
+        profiler.current[self.column] += time.perf_counter() - self.start
+        if profiler.stack:
+            profiler.stack.pop()
+        return False
+
+class Profiler:
+    # Named, nestable timing scopes collected per frame into a ring buffer of the last `capacity` frames.
+    #   with PROFILER.Scope("DrawScene"):
+    #       ...
+    # A scope's name is its path through the enclosing scopes ("UpdateScene/Step"); time from several
+    # entries of the same scope within a frame adds up. Disabled, Scope() returns a shared no-op.
+    def __init__(self, capacity=600):
+        self.enabled = False
+        self.capacity = capacity
+        self.paths = []  # Column -> scope path, in the order scopes were first entered (parents before children)
+        self.columns = {}  # Scope path -> column
+        self.samples = np.full((capacity, 0), np.nan)  # Seconds per frame and scope
+        self.frame_times = np.full(capacity, np.nan)  # Seconds per frame
+        self.frames = 0  # Frames recorded so far
+        self.current = []  # Seconds accumulated per column this frame
+        self.stack = []
+        self.frame_start = None
+
+    def Enable(self, enabled=True):
+        self.enabled = enabled
+        self.stack = []
+        self.frame_start = None
+
+    def Scope(self, name):
+        if not self.enabled:
+            return NULL_SCOPE
+        self.stack.append(name)
+        path = '/'.join(self.stack)
+        column = self.columns.get(path)
+        if column is None:
+            column = self.AddColumn(path)
+        return Scope(self, column)
+
+    def AddColumn(self, path):
+        column = len(self.paths)
+        self.paths.append(path)
+        self.columns[path] = column
+        self.current.append(0.0)
+        self.samples = np.concatenate([self.samples, np.full((self.capacity, 1), np.nan)], axis=1)
+        if self.frames:
+            # The scope didn't run in the frames already recorded
+            self.samples[:min(self.frames, self.capacity), column] = 0.0
+        return column
+
+    def BeginFrame(self):
+        if self.enabled:
+            self.frame_start = time.perf_counter()
+
+    def EndFrame(self):
+        if not self.enabled or self.frame_start is None:
+            return
+        row = self.frames % self.capacity
+        self.frame_times[row] = time.perf_counter() - self.frame_start
+        self.samples[row] = self.current
+        self.current = [0.0] * len(self.paths)
+        self.frames += 1
+
+    def History(self):
+        # (frame times, per-scope samples) of the recorded frames, oldest first, in seconds
+        count = min(self.frames, self.capacity)
+        order = (np.arange(count) + self.frames - count) % self.capacity
+        return self.frame_times[order], self.samples[order]
+
+    def Stats(self):
+        # [(path, mean, p50, p95, p99)] in milliseconds: the whole frame first, then every scope
+        frame_times, samples = self.History()
+        if len(frame_times) == 0:
+            return []
+        columns = np.concatenate([frame_times[:, None], samples], axis=1) * 1000.0
+        mean = np.mean(columns, axis=0)
+        p50, p95, p99 = np.percentile(columns, [50, 95, 99], axis=0)
+        return list(zip(["Frame"] + self.paths, mean, p50, p95, p99))
+
+    def Export(self, path):
+        # Every recorded frame as a CSV row of milliseconds per scope
+        frame_times, samples = self.History()
+        table = np.concatenate([frame_times[:, None], samples], axis=1) * 1000.0
+        header = ",".join(["frame"] + self.paths)
+        np.savetxt(path, table, delimiter=",", fmt="%.4f", header=header, comments="")
+
+    def DrawOverlay(self, export_path="profile.csv"):
+        import imgui
+
+        stats = self.Stats()
+        imgui.set_next_window_size(520, 420, imgui.FIRST_USE_EVER)
+        imgui.begin("Profiler")
+        if not stats:
+            imgui.text("No frames recorded yet")
+            imgui.end()
+            return
+
+        frame_mean = stats[0][1]
+        imgui.text(f"{len(self.History()[0])} frames, {1000.0 / max(frame_mean, 1e-6):.0f} fps average")
+        if imgui.button("Export"):
+            self.Export(export_path)
+            print(f"Profile written to {export_path}")
+
+        # Percentile table, children indented under their parents
+        imgui.text(f"{'scope':<32}{'mean':>8}{'p50':>8}{'p95':>8}{'p99':>8}  ms")
+        for path, mean, p50, p95, p99 in stats:
+            depth = path.count('/') + (path != "Frame")
+            label = "  " * depth + path.rsplit('/', 1)[-1]
+            imgui.text(f"{label:<32}{mean:>8.3f}{p50:>8.3f}{p95:>8.3f}{p99:>8.3f}")
+
+        # Flame-style breakdown of the mean frame: one row per nesting depth, each scope as wide as
+        # its share of the frame and placed after its earlier siblings inside its parent
+        imgui.dummy(0, 10)
+        draw_list = imgui.get_window_draw_list()
+        origin_x, origin_y = imgui.get_cursor_screen_pos()
+        width = imgui.get_content_region_available_width()
+        row_height = 18
+        scale = width / max(frame_mean, 1e-9)
+        colors = [imgui.get_color_u32_rgba(0.9, 0.4, 0.2, 1.0), imgui.get_color_u32_rgba(0.9, 0.6, 0.2, 1.0), imgui.get_color_u32_rgba(0.8, 0.75, 0.25, 1.0)]
+        text_color = imgui.get_color_u32_rgba(0, 0, 0, 1)
+
+        starts = {"" : 0.0}  # Parent path -> x offset where its next child goes
+        depth_max = 0
+        for path, mean, _, _, _ in [("", frame_mean, 0, 0, 0)] + stats[1:]:
+            parent = path.rsplit('/', 1)[0] if '/' in path else ""
+            depth = path.count('/') + 1 if path else 0
+            x = starts[parent] if path else 0.0
+            if path:
+                starts[parent] = x + mean * scale  # The next sibling starts where this scope ends
+            starts[path] = x
+            depth_max = max(depth_max, depth)
+
+            x0, y0 = origin_x + x, origin_y + depth * row_height
+            x1 = x0 + max(mean * scale, 1.0)
+            draw_list.add_rect_filled(x0, y0, x1, y0 + row_height - 2, colors[depth % len(colors)])
+            label = path.rsplit('/', 1)[-1] if path else f"Frame {frame_mean:.2f} ms"
+            if imgui.calc_text_size(label).x < x1 - x0 - 4:
+                draw_list.add_text(x0 + 2, y0 + 1, text_color, label)
+        imgui.dummy(width, (depth_max + 1) * row_height)
+        imgui.end()
+
+# The game's profiler. Off unless enabled (main.py --profile), so the scopes can stay in place.
+PROFILER = Profiler()
@@ -0,0 +1,121 @@
+import struct
+import zlib
+import numpy as np
+from utils.simulation import Simulation
+
+# File layout:
+#   header : magic, version and the NewGame() arguments the session started with
+#   runs   : (input bitmask, dt, tick count) for every stretch of ticks with the same input and dt
+#   footer : written when the session ends cleanly: tick count and a checksum of the final state.
+#            Its tag can't be mistaken for a run, whose mask only uses the low len(KEYS) bits.
+# Replaying the runs through Simulation.Step reproduces the session exactly.
+MAGIC = b'PREC'
+VERSION = 1
+HEADER = struct.Struct('<4sHBBf')  # magic, version, map number, lives, health
+RUN = np.dtype([('mask', '<u2'), ('dt', '<f8'), ('ticks', '<u4')])
+FOOTER = struct.Struct('<4sQI')  # tag, tick count, crc32 of the final state
+FOOTER_TAG = b'DONE'
+
+class RecordingFormatError(Exception):
+    pass
+
+def StateDigest(sim):
+    # Checksum of the complete world state, to compare a replay against the original session
+    state = sim.GetState()
+    digest = 0
+    for name in sorted(state):
+        digest = zlib.crc32(np.ascontiguousarray(state[name]).tobytes(), digest)
+    return digest
+
+class Recorder:
+    # Streams the input bitmask and dt of every simulation tick to a file. Consecutive ticks with
+    # the same inputs and dt are stored as one run, so a held key costs 14 bytes however long it is held.
+    def __init__(self, path, map_number, lives, health, flush_runs=1024):
+        self.path = path
+        self.flush_runs = flush_runs
+        self.runs = []  # Finished runs not written yet
+        self.mask = None  # The run being extended
+        self.dt = None
+        self.count = 0
+        self.ticks = 0
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, map_number, lives, health))
+
+    def Record(self, mask, dt):
+        if mask == self.mask and dt == self.dt:
+            self.count += 1
+        else:
+            if self.count:
+                self.runs.append((self.mask, self.dt, self.count))
+                if len(self.runs) >= self.flush_runs:
+                    self.Flush()
+            self.mask, self.dt, self.count = mask, dt, 1
+        self.ticks += 1
+
+    def Flush(self):
+        with open(self.path, 'ab') as f:
+            f.write(np.array(self.runs, dtype=RUN).tobytes())
+        self.runs = []
+
+    def Close(self, sim):
+        # Write the remaining ticks and the footer. sim is the simulation the ticks were fed to.
+        if self.count:
+            self.runs.append((self.mask, self.dt, self.count))
+            self.count = 0
+        self.Flush()
+        with open(self.path, 'ab') as f:
+            f.write(FOOTER.pack(FOOTER_TAG, self.ticks, StateDigest(sim)))
+
+class Recording:
+    def __init__(self, map_number, lives, health, runs, ticks=None, digest=None):
+        self.map_number = map_number
+        self.lives = lives
+        self.health = health
+        self.runs = runs
+        self.ticks = ticks  # None (and digest None) if the session never ended cleanly
+        self.digest = digest
+
+    def Ticks(self):
+        # (mask, dt) for every tick, in order
+        for mask, dt, count in self.runs.tolist():
+            for _ in range(count):
+                yield mask, dt
+
+def LoadRecording(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise RecordingFormatError("Recording is truncated")
+    magic, version, map_number, lives, health = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise RecordingFormatError("Not a recording")
+    if version > VERSION:
+        raise RecordingFormatError(f"Recording version {version} is newer than supported version {VERSION}")
+
+    body = data[HEADER.size:]
+    ticks = digest = None
+    if len(body) >= FOOTER.size and body[-FOOTER.size:-FOOTER.size + len(FOOTER_TAG)] == FOOTER_TAG:
+        _, ticks, digest = FOOTER.unpack_from(body, len(body) - FOOTER.size)
+        body = body[:-FOOTER.size]
+    # A session that crashed mid-write may end in a partial run, drop it
+    body = body[:len(body) - len(body) % RUN.itemsize]
+    return Recording(map_number, lives, health, np.frombuffer(body, dtype=RUN), ticks, digest)
+
+def Replay(recording, sim=None):
+    # Run a recording headlessly as fast as possible and return the simulation in its final state
+    if sim is None:
+        sim = Simulation()
+    sim.NewGame(recording.map_number, recording.lives, recording.health)
+    for mask, dt, count in recording.runs.tolist():
+        for _ in range(count):
+            sim.Step(mask, dt)
+    return sim
+
+def Verify(path):
+    # Replay a recording and check it ends in the state it was recorded with.
+    # Returns True/False, or None if the recording has no footer to check against.
+    recording = LoadRecording(path)
+    sim = Replay(recording)
+    if recording.digest is None:
+        return None
+    return int(recording.runs['ticks'].sum()) == recording.ticks and StateDigest(sim) == recording.digest
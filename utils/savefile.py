@@ -0,0 +1,184 @@
+import os
+import struct
+import zlib
+import numpy as np
+
+# File layout:
+#   header : magic, format version, rows per block
+#   frames : one appended per save. The first frame after a rewrite holds every block, later
+#            frames only hold the blocks that changed since the previous save.
+#   frame  : b'FRAM', record count, the records, then a crc32 of the record headers
+#   record : one block of rows of one named 0-2 dimensional array as raw little-endian bytes,
+#            optionally zlib compressed, with the crc32 of the uncompressed bytes in its header
+# Loading replays the frames in order, so the newest copy of every block wins. A frame that is
+# cut short or fails a checksum (a crash while appending it) ends the replay: the state of the
+# last good frame is returned. Version 1 files have no checksums.
+MAGIC = b'PSAV'
+VERSION = 2
+HEADER = struct.Struct('<4sHI')  # magic, version, rows per block
+FRAME = struct.Struct('<4sI')  # tag, record count
+RECORDS = {
+    1 : struct.Struct('<H8sB4I?I'),  # name length, dtype, ndim, rows, row size, block, block rows, compressed, payload length
+    2 : struct.Struct('<H8sB4I?II'),  # ... and the crc32 of the uncompressed payload
+}
+RECORD = RECORDS[VERSION]
+FRAME_END = struct.Struct('<I')  # crc32 of the frame's record headers and names
+FRAME_TAG = b'FRAM'
+
+class SaveFormatError(Exception):
+    pass
+
+class SaveWriter:
+    # Writes world state dicts ({name : array}) to a save file, appending only the blocks that
+    # changed since the last save. The file is rewritten in full once it holds max_frames
+    # frames or when the set of arrays or their shapes changed (e.g. a new map).
+    # A read-only array that is the very array saved last time under its name is taken as
+    # unchanged without looking at its bytes, so tables shared copy-on-write (see
+    # Simulation.GetState(share=True)) cost nothing to save until they change.
+    def __init__(self, path, compress=False, block_rows=4096, max_frames=16):
+        self.path = path
+        self.compress = compress
+        self.block_rows = block_rows
+        self.max_frames = max_frames
+        self.frames = 0
+        self.checksums = {}  # (name, block) -> crc32 of the bytes the file holds
+        self.layout = {}  # name -> (shape, dtype) the file holds
+        self.saved = {}  # name -> read-only array the file holds
+
+    def Reset(self):
+        # Forget what the file holds, the next save rewrites it
+        self.frames = 0
+
+    def Save(self, state):
+        state = {name : np.asarray(array) for name, array in state.items()}
+        layout = {name : (array.shape, array.dtype.str) for name, array in state.items()}
+        full = self.frames == 0 or self.frames >= self.max_frames or layout != self.layout or not os.path.exists(self.path)
+        if full:
+            self.checksums = {}
+            self.saved = {}
+
+        records = []
+        for name, array in state.items():
+            if array.ndim > 2:
+                raise ValueError(f"Can't save {name}: only 0-2 dimensional arrays are supported")
+            if self.saved.get(name) is array:
+                continue
+            self.saved[name] = array if not array.flags.writeable else None
+            dtype = array.dtype.newbyteorder('<')
+            rows = array.reshape(-1 if array.ndim < 2 else len(array), 1 if array.ndim < 2 else array.shape[1])
+            for block, start in enumerate(range(0, max(len(rows), 1), self.block_rows)):
+                block_data = np.ascontiguousarray(rows[start:start + self.block_rows], dtype=dtype)
+                payload = memoryview(block_data).cast('B')  # No copy when the rows already are little-endian and contiguous
+                checksum = zlib.crc32(payload)
+                if self.checksums.get((name, block)) == checksum:
+                    continue
+                self.checksums[(name, block)] = checksum
+                records.append((name, dtype, array.ndim, rows.shape, block, len(block_data), checksum, payload))
+
+        with open(self.path, 'wb' if full else 'ab') as f:
+            if full:
+                f.write(HEADER.pack(MAGIC, VERSION, self.block_rows))
+                self.frames = 0
+            f.write(FRAME.pack(FRAME_TAG, len(records)))
+            frame_checksum = 0
+            for name, dtype, ndim, shape, block, block_rows, checksum, payload in records:
+                if self.compress:
+                    payload = zlib.compress(payload, 1)
+                encoded_name = name.encode('utf-8')
+                header = RECORD.pack(len(encoded_name), dtype.str.encode('ascii'), ndim, shape[0], shape[1], block, block_rows, self.compress, len(payload), checksum)
+                frame_checksum = zlib.crc32(encoded_name, zlib.crc32(header, frame_checksum))
+                f.write(header)
+                f.write(encoded_name)
+                f.write(payload)
+            f.write(FRAME_END.pack(frame_checksum))
+
+        self.frames += 1
+        self.layout = layout
+        return len(records)
+
+def IsSaveFile(path):
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+def ReadFrame(data, offset, version):
+    # (records, offset past the frame) of the frame at offset: records are (name, dtype, ndim,
+    # rows, row size, block, block rows, payload). Raises SaveFormatError if the frame is cut
+    # short or doesn't match its checksums.
+    record_struct = RECORDS[version]
+    if offset + FRAME.size > len(data):
+        raise SaveFormatError("Save file is truncated")
+    tag, count = FRAME.unpack_from(data, offset)
+    if tag != FRAME_TAG:
+        raise SaveFormatError("Corrupt frame in save file")
+    offset += FRAME.size
+
+    records = []
+    frame_checksum = 0
+    for _ in range(count):
+        if offset + record_struct.size > len(data):
+            raise SaveFormatError("Save file is truncated")
+        name_length, dtype, ndim, rows, row_size, block, block_rows, compressed, length, *checksum = record_struct.unpack_from(data, offset)
+        encoded_name = data[offset + record_struct.size:offset + record_struct.size + name_length]
+        frame_checksum = zlib.crc32(encoded_name, zlib.crc32(data[offset:offset + record_struct.size], frame_checksum))
+        offset += record_struct.size + name_length
+        payload = data[offset:offset + length]
+        offset += length
+        if len(payload) != length:
+            raise SaveFormatError("Save file is truncated")
+        try:
+            if compressed:
+                payload = zlib.decompress(payload)
+            name = encoded_name.decode('utf-8')
+            dtype = np.dtype(dtype.rstrip(b'\0').decode('ascii'))
+        except (zlib.error, UnicodeDecodeError, TypeError, ValueError):
+            raise SaveFormatError("Corrupt record in save file")
+        if checksum and zlib.crc32(payload) != checksum[0]:
+            raise SaveFormatError("Corrupt record in save file")
+        if len(payload) != block_rows * row_size * dtype.itemsize:
+            raise SaveFormatError("Corrupt record in save file")
+        records.append((name, dtype, ndim, rows, row_size, block, block_rows, payload))
+
+    if version >= 2:
+        if offset + FRAME_END.size > len(data):
+            raise SaveFormatError("Save file is truncated")
+        if FRAME_END.unpack_from(data, offset)[0] != frame_checksum:
+            raise SaveFormatError("Corrupt frame in save file")
+        offset += FRAME_END.size
+    return records, offset
+
+def Load(path):
+    # Rebuild the most recent state dict saved to path. Only a bad header or first frame is an
+    # error: a bad later frame is where a save was interrupted, and loading stops before it.
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise SaveFormatError("Save file is truncated")
+    magic, version, block_size = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise SaveFormatError("Not a save file")
+    if version > VERSION:
+        raise SaveFormatError(f"Save file version {version} is newer than supported version {VERSION}")
+
+    arrays = {}
+    dimensions = {}
+    offset = HEADER.size
+    while offset < len(data):
+        try:
+            records, offset = ReadFrame(data, offset, version)
+        except SaveFormatError:
+            if not arrays:
+                raise
+            break
+
+        for name, dtype, ndim, rows, row_size, block, block_rows, payload in records:
+            if name not in arrays or arrays[name].shape != (rows, row_size) or arrays[name].dtype != dtype:
+                arrays[name] = np.zeros((rows, row_size), dtype=dtype)
+            dimensions[name] = ndim
+            start = block * block_size
+            arrays[name][start:start + block_rows] = np.frombuffer(payload, dtype=dtype).reshape(block_rows, row_size)
+
+    state = {}
+    for name, array in arrays.items():
+        array = array.astype(array.dtype.newbyteorder('='), copy=False)
+        state[name] = array.reshape(()) if dimensions[name] == 0 else array.reshape(-1) if dimensions[name] == 1 else array
+    return state
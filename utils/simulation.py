@@ -0,0 +1,589 @@
+import numpy as np
+from collections import deque
+from assets.objects.objects import platformProps, keyProps, enemyProps
+from utils.entities import EntityStore, UpdateMovers, ResetTravel, MoverPositions
+from utils.collision import SweptOverlap, SweptRange, Touched, Durations, Total, Coverage
+from utils.spatial import UniformGrid
+from utils.leaf_graph import LeafGraph
+from utils import levels
+from utils.profiler import PROFILER
+from utils.inputs import KEY_W, KEY_A, KEY_S, KEY_D, KEY_SPACE, KEY_E
+from utils.events import KEY_COLLECTED, LIFE_LOST, RESPAWNED, MAP_ADVANCED, VICTORY, GAME_OVER
+
+# Screen codes shared with Game: 1 = map 1, 4 = map 2, 2 = victory, 3 = game over
+MAP1_SCREEN = 1
+VICTORY_SCREEN = 2
+GAME_OVER_SCREEN = 3
+MAP2_SCREEN = 4
+
+# Collision radii (player centre to entity centre)
+PLATFORM_RADIUS = 60
+KEY_RADIUS = 70
+ENEMY_RADIUS = 50
+GRID_CELL_SIZE = 150  # No smaller than the widest query (2 * KEY_RADIUS), so a query overlaps at most 2x2 cells
+
+# World the maps are laid out in unless their layout says otherwise: [x_min, x_max, y_min, y_max],
+# with a bank of BANK_WIDTH at either end of the x range and water in between
+WORLD_EXTENT = (-500.0, 500.0, -500.0, 500.0)
+BANK_WIDTH = 100.0
+GOAL_HALF_HEIGHT = 50  # The exit is where the right bank is within this of y = 0
+
+# Map 2 vine swinging
+LEAF_RISE = 20  # How far active leaves rise above their base
+BANK_SWING_REACH = 100  # With every key, swings from within this of the right bank go onto it
+
+# Scalar state captured by GetState, in order, with the type each is restored as
+SCALAR_STATE = (
+    ('screen', int),
+    ('current_map', int),
+    ('time', float),
+    ('player_health', float),
+    ('player_lives', int),
+    ('keys_collected', int),
+    ('player_velocity_z', float),
+    ('is_grounded', bool),
+    ('player_speed', float),
+    ('is_drowning', bool),
+    ('oxygen_level', float),
+    ('vine_active', bool),
+    ('vine_timer', float),
+    ('previous_inputs', int),
+)
+
+ENTITY_STORES = ('platforms', 'keys', 'enemies')
+
+class Snapshot:
+    # Immutable world state from Simulation.Capture(), restored with Simulation.Restore(). Nothing
+    # is copied but the player position: entity tables and grids are shared read-only with the
+    # simulation (and with earlier snapshots), which copies a table only when it next changes it.
+    # Tables that didn't change between two snapshots are the same arrays in both.
+    __slots__ = ('scalars', 'world', 'player_position', 'vine_start', 'vine_end', 'stores', 'grids', 'leaf_graph')
+
+    def __init__(self, scalars, world, player_position, vine_start, vine_end, stores, grids, leaf_graph):
+        self.scalars = scalars  # Values of SCALAR_STATE, in order
+        self.world = world  # (world_extent, bank_width)
+        self.player_position = player_position
+        self.vine_start = vine_start
+        self.vine_end = vine_end
+        self.stores = stores  # Store name -> {field : array}
+        self.grids = grids  # UniformGrid.State() of the platform, key and enemy grids
+        self.leaf_graph = leaf_graph
+
+    def __setattr__(self, name, value):
+        if hasattr(self, name):
+            raise AttributeError("Snapshots are immutable")
+        object.__setattr__(self, name, value)
+
+class Simulation:
+    # Pure NumPy game state. Step it with (input bitmask, dt); the renderer only reads from it.
+    def __init__(self):
+        # Player movement properties
+        self.jump_speed = 400.0
+        self.gravity = 800.0
+        self.normal_speed = 500.0
+        self.water_speed = 250.0
+        self.player_radius = 30
+
+        # Oxygen
+        self.max_oxygen = 2.0  # 2 seconds of oxygen
+        self.oxygen_regen_rate = 0.5  # Regenerate 0.5 oxygen per second
+
+        # Vine swinging
+        self.vine_duration = 0.2  # Duration of vine animation in seconds
+        self.vine_range = 500
+        self.leaf_toggle_interval = 2.0  # seconds between active/inactive states
+
+        # (kind, value) state-change events since someone last drained them (see utils/journal.py).
+        # Bounded so a simulation nobody watches doesn't grow it forever.
+        self.events = deque(maxlen=1024)
+
+        # Map layouts: level file paths, or layout dicts (replaceable for level tuning)
+        self.layouts = {1 : levels.LevelPath(1), 2 : levels.LevelPath(2)}
+
+        self.platforms = EntityStore()
+        self.keys = EntityStore()
+        self.enemies = EntityStore()
+
+        self.SetWorld(WORLD_EXTENT, BANK_WIDTH)
+        self.Reset()
+
+    def Reset(self, lives=3, health=100):
+        # Everything a session changes, as a fresh session starts it. Tuning (speeds, gravity,
+        # oxygen capacity, vine and leaf timing), layouts and the loaded map are left alone.
+        self.screen = MAP1_SCREEN
+        self.current_map = 1
+        self.time = 0.0  # Simulation clock, replaces glfw.get_time() for leaf timing
+
+        # Player stats
+        self.player_health = health
+        self.player_lives = lives
+        self.keys_collected = 0
+
+        self.player_speed = self.normal_speed
+        self.player_position = np.array([-450.0, 0.0, 1.0], dtype=np.float32)
+        self.player_velocity_z = 0
+        self.is_grounded = False
+
+        self.is_drowning = False
+        self.oxygen_level = self.max_oxygen
+
+        self.vine_active = False
+        self.vine_start = None
+        self.vine_end = None
+        self.vine_timer = 0
+
+        # Inputs held on the previous tick, to tell a fresh key press from a held key
+        self.previous_inputs = 0
+        self.events.clear()
+
+    def SetWorld(self, extent, bank_width):
+        # World rectangle [x_min, x_max, y_min, y_max] of the current map. The camera scrolls within
+        # it, the banks take bank_width at either end of it and everything between them is water.
+        self.world_extent = np.asarray(extent, dtype=np.float32)
+        self.bank_width = float(bank_width)
+        self.world_min = self.world_extent[[0, 2]]
+        self.world_max = self.world_extent[[1, 3]]
+        self.left_bank_x = float(self.world_extent[0]) + self.bank_width  # Water starts past here
+        self.right_bank_x = float(self.world_extent[1]) - self.bank_width  # and ends here
+        self.respawn_position = np.array([self.left_bank_x - self.bank_width / 2, 0, 0], dtype=np.float32)
+        self.exit_position = np.array([self.right_bank_x + self.bank_width / 2, 0, 0], dtype=np.float32)
+
+        # One broad-phase grid per entity store, spanning the world
+        self.platform_grid = UniformGrid(self.world_min, self.world_max, GRID_CELL_SIZE)
+        self.key_grid = UniformGrid(self.world_min, self.world_max, GRID_CELL_SIZE)
+        self.enemy_grid = UniformGrid(self.world_min, self.world_max, GRID_CELL_SIZE)
+
+    def NewGame(self, map_number=1, lives=3, health=100):
+        # Start a session from scratch: nothing carries over from the previous one
+        self.Reset(lives, health)
+        self.InitMap(map_number)
+
+    def InitMap(self, map_number):
+        self.current_map = map_number
+        self.screen = MAP1_SCREEN if map_number == 1 else MAP2_SCREEN
+        self.time = 0.0
+        self.keys_collected = 0
+        self.platforms = EntityStore()
+        self.keys = EntityStore()
+        self.enemies = EntityStore()
+        self.vine_active = False
+        self.leaf_graph = None
+
+        layout = self.layouts[map_number]
+        if isinstance(layout, str):
+            player_start = self.LoadLevel(layout)
+        else:
+            self.SetWorld(layout.get('world_extent', WORLD_EXTENT), layout.get('bank_width', BANK_WIDTH))
+            self.BuildLayout(map_number, layout)
+            player_start = layout['player_start']
+        # Movers follow closed-form trajectories from here on
+        ResetTravel(self.platforms, self.time)
+        ResetTravel(self.enemies, self.time)
+
+        self.platform_grid.Rebuild(self.platforms.position)
+        self.key_grid.Rebuild(self.keys.position)
+        self.enemy_grid.Rebuild(self.enemies.position)
+
+        self.player_position = np.array(player_start, dtype=np.float32)
+        self.player_velocity_z = 0
+        self.is_grounded = True
+
+    def LoadLevel(self, path):
+        # Point the entity stores straight at the level file's memory-mapped arrays
+        level = levels.LoadLevel(path)
+        self.SetWorld(level.world_extent, level.bank_width)
+        for store_name in ENTITY_STORES:
+            getattr(self, store_name).SetFields(level.tables[store_name], copy=False)
+        if level.leaf_toggle_interval != self.leaf_toggle_interval and self.platforms.count:
+            # Leaf phases were spread over the interval the file was built with
+            self.platforms.phase_offset = self.platforms.phase_offset * (self.leaf_toggle_interval / level.leaf_toggle_interval)
+        return level.player_start
+
+    def BuildLayout(self, map_number, layout):
+        # Fill the entity stores from a layout dict (see assets/maps/maps.py)
+        platform_defaults = {
+            'speed' : platformProps['speed'],
+            'direction' : platformProps['direction'],
+            'bounds' : platformProps['bounds'],
+            'movement_type' : platformProps['movement_type']
+        }
+
+        if map_number == 1:
+            x_positions = np.array(layout['vertical_positions'], dtype=np.float32)
+            self.platforms.AddMany(
+                np.stack([x_positions, np.zeros_like(x_positions), np.zeros_like(x_positions)], axis=1),
+                **dict(platform_defaults, movement_type='vertical', speed=layout['vertical_speed'])
+            )
+
+            x_positions = np.array(layout['horizontal_positions'], dtype=np.float32)
+            y_positions = np.array(layout['horizontal_y_positions'], dtype=np.float32)
+            self.platforms.AddMany(
+                np.stack([x_positions, y_positions, np.zeros_like(x_positions)], axis=1),
+                **dict(platform_defaults, movement_type='horizontal', speed=layout['horizontal_speed'], bounds=layout['horizontal_bounds'])
+            )
+
+            x_positions = np.array(layout['enemy_positions'], dtype=np.float32)
+            self.enemies.AddMany(
+                np.stack([x_positions, np.zeros_like(x_positions), np.ones_like(x_positions)], axis=1),
+                speed=layout.get('enemy_speed', enemyProps['speed']),
+                direction=enemyProps['direction'],
+                bounds=enemyProps['bounds'],
+                movement_type=enemyProps['movement_type']
+            )
+
+        else:
+            leaf_positions = np.array(layout['leaf_positions'], dtype=np.float32)
+            n_leaves = len(leaf_positions)
+            self.platforms.AddMany(
+                np.concatenate([leaf_positions, np.zeros((n_leaves, 1), dtype=np.float32)], axis=1),
+                **dict(platform_defaults, speed=0.0),  # Leaves don't move, they only rise and fall
+                is_active=True,
+                phase_offset=np.arange(n_leaves) * self.leaf_toggle_interval / n_leaves,
+                base_y=leaf_positions[:, 1]
+            )
+
+        # Keys sit slightly above their platform, in front of it
+        key_platforms = np.array(layout['key_platform_indices'], dtype=np.int32)
+        key_positions = self.platforms.position[key_platforms].copy()
+        key_positions[:, 1] += 15
+        key_positions[:, 2] = 2.0
+        self.keys.AddMany(key_positions, collected=keyProps['collected'], platform_index=key_platforms)
+
+    def GetState(self, share=False):
+        # Full world state as a flat {name : array} dict. Arrays are the live ones, not copies.
+        # With share the entity tables are frozen and shared as Capture() shares them, so they
+        # stay as they are and a table that hasn't changed is the same array on the next call.
+        vine = np.full((2, 3), np.nan, dtype=np.float32)
+        if self.vine_start is not None:
+            vine[0] = self.vine_start
+            vine[1] = self.vine_end
+        state = {
+            'scalars' : np.array([getattr(self, name) for name, _ in SCALAR_STATE], dtype=np.float64),
+            'player_position' : self.player_position,
+            'vine' : vine,
+            'world' : np.append(self.world_extent, self.bank_width),
+        }
+        for store_name in ENTITY_STORES:
+            store = getattr(self, store_name)
+            for field, array in (store.Share() if share else store.Fields()).items():
+                state[store_name + '.' + field] = array
+        return state
+
+    def SetState(self, state):
+        for (name, kind), value in zip(SCALAR_STATE, state['scalars']):
+            setattr(self, name, kind(value))
+        if 'world' in state:
+            self.SetWorld(state['world'][:4], state['world'][4])
+        else:
+            self.SetWorld(WORLD_EXTENT, BANK_WIDTH)  # Saved before maps had their own extent
+        self.player_position = np.array(state['player_position'], dtype=np.float32)
+        self.events.clear()  # Whatever was pending belonged to the state being replaced
+        self.leaf_graph = None  # Built for the layout being replaced
+        vine = np.asarray(state['vine'], dtype=np.float32)
+        self.vine_start = None if np.isnan(vine[0]).any() else vine[0].copy()
+        self.vine_end = None if np.isnan(vine[1]).any() else vine[1].copy()
+
+        for store_name in ENTITY_STORES:
+            prefix = store_name + '.'
+            getattr(self, store_name).SetFields({name[len(prefix):] : array for name, array in state.items() if name.startswith(prefix)})
+            if prefix + 'travel' not in state:
+                ResetTravel(getattr(self, store_name), self.time)  # Saved before movers had trajectories
+
+        self.platform_grid.Rebuild(self.platforms.position)
+        self.key_grid.Rebuild(self.keys.position)
+        self.enemy_grid.Rebuild(self.enemies.position)
+
+    def Capture(self):
+        # Snapshot of the whole world state, cheap enough to take every tick
+        player_position = self.player_position.copy()
+        player_position.flags.writeable = False
+        return Snapshot(
+            tuple([getattr(self, name) for name, _ in SCALAR_STATE]),
+            (self.world_extent, self.bank_width),
+            player_position,
+            self.vine_start,
+            self.vine_end,
+            {store_name : getattr(self, store_name).Share() for store_name in ENTITY_STORES},
+            (self.platform_grid.State(), self.key_grid.State(), self.enemy_grid.State()),
+            self.leaf_graph
+        )
+
+    def Restore(self, snapshot):
+        # Return to a Capture()d state. The snapshot stays valid and can be restored again.
+        for (name, _), value in zip(SCALAR_STATE, snapshot.scalars):
+            setattr(self, name, value)
+        if snapshot.world[0] is not self.world_extent:
+            self.SetWorld(*snapshot.world)
+        self.player_position = snapshot.player_position.copy()
+        self.vine_start = snapshot.vine_start
+        self.vine_end = snapshot.vine_end
+        for store_name, fields in snapshot.stores.items():
+            getattr(self, store_name).SetFields(fields, copy=False)
+        self.platform_grid.SetState(snapshot.grids[0])
+        self.key_grid.SetState(snapshot.grids[1])
+        self.enemy_grid.SetState(snapshot.grids[2])
+        self.leaf_graph = snapshot.leaf_graph
+        self.events.clear()
+
+    def Step(self, inputs, dt):
+        if self.screen != MAP1_SCREEN and self.screen != MAP2_SCREEN:
+            return
+
+        self.time += dt
+        with PROFILER.Scope("Movers"):
+            UpdateMovers(self.enemies, self.time)
+            UpdateMovers(self.platforms, self.time)
+            self.enemy_grid.Update(self.enemies.position)
+            self.platform_grid.Update(self.platforms.position)
+        previous_position = self.player_position.copy()
+        self.UpdatePlayer(inputs, dt)
+        with PROFILER.Scope("CheckCollisions"):
+            self.CheckCollisions(dt, previous_position)
+
+        # Vine swinging mechanic (only in map 2)
+        if self.screen == MAP2_SCREEN:
+            with PROFILER.Scope("Vines"):
+                self.UpdateVine(inputs, dt)
+                self.UpdateLeaves()
+
+        self.previous_inputs = inputs
+
+    def UpdatePlayer(self, inputs, dt):
+        move_x = 0.0
+        move_y = 0.0
+
+        if inputs & KEY_A:
+            move_x -= self.player_speed
+        if inputs & KEY_D:
+            move_x += self.player_speed
+        if inputs & KEY_W:
+            move_y += self.player_speed
+        if inputs & KEY_S:
+            move_y -= self.player_speed
+
+        # Jump with spacebar when grounded (map 1 only)
+        if inputs & KEY_SPACE and self.is_grounded and self.screen == MAP1_SCREEN:
+            self.player_velocity_z = self.jump_speed
+            self.is_grounded = False
+
+        # Only apply gravity if player is above ground level
+        if self.player_position[2] > 0 or self.player_velocity_z > 0:
+            self.player_velocity_z -= self.gravity * dt
+        else:
+            self.player_position[2] = 0
+            self.player_velocity_z = 0
+            self.is_grounded = True
+
+        self.player_position[0] += move_x * dt
+        self.player_position[1] += move_y * dt
+        self.player_position[2] += self.player_velocity_z * dt
+
+    def Emit(self, kind, value=0):
+        self.events.append((kind, value))
+
+    def Respawn(self):
+        self.Emit(RESPAWNED)
+        self.player_health = 100
+        self.player_position = self.respawn_position.copy()  # On the left bank
+        self.player_velocity_z = 0
+        self.is_grounded = True
+
+    def LoseLife(self):
+        # Returns False when that was the last life
+        if self.player_lives > 1:
+            self.player_lives -= 1
+            self.Emit(LIFE_LOST, self.player_lives)
+            self.Respawn()
+            self.oxygen_level = self.max_oxygen  # Reset oxygen on death
+            return True
+        self.screen = GAME_OVER_SCREEN
+        self.Emit(GAME_OVER)
+        return False
+
+    def Sweep(self, store, grid, start, end, radius, dt):
+        # Entities whose circle the player's path from start to end touched during the last step,
+        # with their (enter, leave) step fractions. The broad phase is the path's bounding box, grown
+        # by the radius and by how far a mover can go in one step.
+        reach = radius + float(np.abs(store.speed).max(initial=0)) * dt
+        lo, hi = np.minimum(start, end)[:2] - reach, np.maximum(start, end)[:2] + reach
+        entities = grid.InRect(lo, hi)
+        # Grid cells are coarse; trim to the box itself before the exact test
+        xy = store.position[entities, :2]
+        entities = np.sort(entities[np.all((lo <= xy) & (xy <= hi), axis=1)])
+        if len(entities) == 0:
+            return entities, np.zeros(0), np.zeros(0)
+        enter, leave = SweptOverlap(start, end, MoverPositions(store, self.time - dt, entities), store.position[entities], radius)
+        return entities, enter, leave
+
+    def WetFraction(self, start, end, platforms, enter, leave):
+        # Fraction of the step the player spent over open water: off the banks and off every platform
+        # it stood on at the end of the step. platforms/enter/leave are from Sweep.
+        supported = end[2] > self.platforms.position[platforms, 2]
+        left_enter, left_leave = SweptRange(start[0], end[0], -np.inf, self.left_bank_x)
+        right_enter, right_leave = SweptRange(start[0], end[0], self.right_bank_x, np.inf)
+        dry = Coverage(np.concatenate([np.where(supported, enter, np.inf), [left_enter, right_enter]]),
+                       np.concatenate([np.where(supported, leave, -np.inf), [left_leave, right_leave]]))
+        return 1.0 - dry
+
+    def CheckCollisions(self, dt, previous_position=None):
+        # Keys, enemies and water are swept along the player's path since previous_position
+        # (default: the player didn't move), so a long step can't skip past them
+        player_pos = self.player_position.copy()
+        start = player_pos if previous_position is None else np.asarray(previous_position, dtype=np.float32)
+
+        self.is_grounded = False
+
+        player_xy = player_pos[:2]
+
+        # Platform collisions
+        _, platforms = self.platform_grid.Overlaps(player_xy, self.platforms.position, PLATFORM_RADIUS)
+        platforms = platforms[player_pos[2] > self.platforms.position[platforms, 2]]
+        if len(platforms) > 0:
+            self.is_grounded = True
+            self.player_position[2] = self.platforms.position[platforms, 2].max() + 40
+            self.player_velocity_z = 0
+
+        # Key collection, anywhere along the path
+        keys, enter, leave = self.Sweep(self.keys, self.key_grid, start, player_pos, KEY_RADIUS, dt)
+        keys = keys[Touched(enter, leave) & ~self.keys.collected[keys]]
+        if len(keys):
+            self.keys.Writable('collected')[keys] = True
+        self.keys_collected += len(keys)
+        for key in keys.tolist():
+            self.Emit(KEY_COLLECTED, key)
+
+        # Ground (banks) collision
+        if self.player_position[0] <= self.left_bank_x or self.player_position[0] >= self.right_bank_x:
+            if self.player_position[2] <= 0:
+                self.player_position[2] = 0
+                self.player_velocity_z = 0
+                self.is_grounded = True
+
+        # In water and not on a platform
+        if self.left_bank_x < player_pos[0] < self.right_bank_x and not self.is_grounded:
+            if self.player_position[2] <= 10:
+                self.is_drowning = True
+                if self.screen == MAP1_SCREEN:
+                    # Only the part of the step actually spent over water counts
+                    wet_dt = dt * self.WetFraction(start, player_pos, *self.Sweep(self.platforms, self.platform_grid, start, player_pos, PLATFORM_RADIUS, dt))
+                    self.oxygen_level = max(0, self.oxygen_level - wet_dt)
+
+                    # Slow movement and damage until oxygen runs out, then death
+                    if self.oxygen_level > 0:
+                        self.player_speed = self.water_speed
+                        self.player_health = max(0, self.player_health - 10 * wet_dt)
+                    else:
+                        self.LoseLife()
+                        self.is_drowning = False
+
+                elif self.screen == MAP2_SCREEN:
+                    self.player_speed = self.water_speed * 0.05
+        else:
+            # Out of water behavior
+            self.is_drowning = False
+            if self.screen == MAP1_SCREEN:  # Only regenerate oxygen in map 1
+                self.oxygen_level = min(self.max_oxygen, self.oxygen_level + self.oxygen_regen_rate * dt)
+            self.player_speed = self.normal_speed
+
+        # Constant oxygen depletion in map 2 (fully depleted in 100 seconds)
+        if self.current_map == 2 and self.screen != GAME_OVER_SCREEN:
+            self.oxygen_level = max(0, self.oxygen_level - (self.max_oxygen / 100.0) * dt)
+            if self.oxygen_level <= 0:
+                self.LoseLife()
+
+        at_right_bank = player_pos[0] > self.right_bank_x and -GOAL_HALF_HEIGHT < player_pos[1] < GOAL_HALF_HEIGHT and self.keys_collected == 3
+        if at_right_bank and self.screen == MAP1_SCREEN:
+            self.InitMap(2)  # Advance to map 2
+            self.Emit(MAP_ADVANCED, 2)
+            return
+        elif at_right_bank and self.screen == MAP2_SCREEN:
+            self.screen = VICTORY_SCREEN
+            self.Emit(VICTORY)
+            return
+
+        # Enemy collisions deal 5 damage per second, per enemy touching the player, for as long as it touched
+        _, enter, leave = self.Sweep(self.enemies, self.enemy_grid, start, player_pos, ENEMY_RADIUS, dt)
+        touching = float(Total(Durations(enter, leave)))
+        if touching > 0:
+            self.player_health = max(0, self.player_health - 5 * dt * touching)
+            if self.player_health <= 0 and self.player_lives > 0:
+                self.player_lives -= 1
+                self.Emit(LIFE_LOST, self.player_lives)
+                self.Respawn()
+            elif self.player_health <= 0:
+                self.screen = GAME_OVER_SCREEN
+                self.Emit(GAME_OVER)
+
+    def UpdateVine(self, inputs, dt):
+        # One swing per press, holding E doesn't keep swinging
+        if inputs & KEY_E and not self.previous_inputs & KEY_E and not self.vine_active:
+            target, dist = self.FindClosestLeaf()
+            if target is not None and dist < self.vine_range:
+                self.vine_active = True
+                self.vine_start = self.player_position.copy()
+                self.vine_end = target.copy()
+                self.vine_timer = 0
+                # Immediately move player to leaf center
+                self.player_position = target.copy()
+                self.player_velocity_z = 0
+                self.is_grounded = True
+
+        if self.vine_active:
+            self.vine_timer += dt
+            if self.vine_timer >= self.vine_duration:
+                self.vine_active = False
+
+    def UpdateLeaves(self):
+        leaves = self.platforms
+        phase = self.time + leaves.phase_offset.astype(np.float64)
+        # Toggle active state every leaf_toggle_interval seconds, active leaves rise slightly
+        leaves.is_active = (phase % (2.0 * self.leaf_toggle_interval)) < self.leaf_toggle_interval
+        heights = np.where(leaves.is_active, leaves.base_y + LEAF_RISE, leaves.base_y)
+        if not np.array_equal(heights, leaves.position[:, 1]):  # Leave the table shared until a leaf toggles
+            leaves.Writable('position')[:, 1] = heights
+
+    def LeafGraph(self):
+        # Swing graph of the current leaf layout, built on first use after a map starts
+        if self.leaf_graph is None:
+            base = self.platforms.position.copy()
+            base[:, 1] = self.platforms.base_y
+            self.leaf_graph = LeafGraph(base, self.platforms.phase_offset, self.leaf_toggle_interval, self.vine_range, LEAF_RISE,
+                                        self.keys.position, KEY_RADIUS, self.right_bank_x - BANK_SWING_REACH, self.vine_duration)
+        return self.leaf_graph
+
+    def RouteToBank(self, dt=0.0):
+        # Earliest-arrival vine swings from where the player is now to the right bank, as
+        # [(simulation time, leaf index or leaf_graph.BANK)], or None if it can't be reached.
+        # Given the tick length dt, the route is followed by holding E for the Step(inputs, dt)
+        # call made while self.time, read before that step, is at or past each time for the first
+        # time. Judging by the time after the step presses a tick early and misses the leaf.
+        ready = self.time + self.vine_duration - self.vine_timer + 2 * dt if self.vine_active else None
+        if self.time == 0.0:
+            ready = dt  # The leaves are laid out by the first step, swing after it
+        return self.LeafGraph().Route(self.player_position, self.time, self.keys.collected, ready, dt)
+
+    def FindClosestLeaf(self):
+        # Returns the position of the vine target and its distance, or (None, inf)
+        player_pos = self.player_position
+
+        # From the rightmost leaf with all keys, the right bank is the target
+        if len(self.platforms) > 0 and player_pos[0] >= self.right_bank_x - BANK_SWING_REACH and self.keys_collected == 3:
+            return self.exit_position.copy(), 150  # Fixed distance to make it reachable
+
+        # Only active leaves in the grid cells within vine range can be swung to. The grid lags the
+        # leaves' rise by a tick, so the search box is grown by the rise.
+        reach = self.vine_range + LEAF_RISE
+        nearby = self.platform_grid.InRect(player_pos[:2] - reach, player_pos[:2] + reach)
+        active = np.sort(nearby[self.platforms.is_active[nearby]])
+        if len(active) == 0:
+            return None, float('inf')
+        dists = np.hypot(self.platforms.position[active, 0] - player_pos[0], self.platforms.position[active, 1] - player_pos[1])
+        order = np.argsort(dists, kind='stable')[:2]
+
+        # If player is on or very close to the closest leaf, use the second closest
+        if dists[order[0]] < 1:
+            if len(order) < 2:
+                return None, float('inf')
+            order = order[1:]
+        closest = active[order[0]]
+        return self.platforms.position[closest], float(dists[order[0]])
@@ -0,0 +1,90 @@
+import numpy as np
+
+class UniformGrid:
+    # Uniform grid over the world. Entities are bucketed by cell with a counting sort so
+    # a query only touches the few cells its circle overlaps.
+    def __init__(self, world_min, world_max, cell_size):
+        self.world_min = np.array(world_min, dtype=np.float32)
+        self.cell_size = float(cell_size)
+        extent = np.array(world_max, dtype=np.float32) - self.world_min
+        self.shape = np.maximum(np.ceil(extent / self.cell_size).astype(np.int64), 1)  # cells along (x, y)
+
+        self.cells = np.zeros(0, dtype=np.int64)  # Cell of each entity
+        self.order = np.zeros(0, dtype=np.int64)  # Entity indices sorted by cell
+        self.cell_start = np.zeros(self.shape[0] * self.shape[1] + 1, dtype=np.int64)
+
+    def CellCoords(self, points):
+        # Points outside the world are clamped into the border cells
+        coords = np.floor((points - self.world_min) / self.cell_size).astype(np.int64)
+        return np.clip(coords, 0, self.shape - 1)
+
+    def Rebuild(self, positions):
+        coords = self.CellCoords(positions[:, :2])
+        self.cells = coords[:, 1] * self.shape[0] + coords[:, 0]
+        self.order = np.argsort(self.cells, kind='stable')
+        counts = np.bincount(self.cells, minlength=self.shape[0] * self.shape[1])
+        # Arrays are replaced rather than updated in place, so a State() taken earlier stays valid
+        self.cell_start = np.concatenate([[0], np.cumsum(counts)])
+
+    def State(self):
+        return self.world_min, self.shape, self.cells, self.order, self.cell_start
+
+    def SetState(self, state):
+        self.world_min, self.shape, self.cells, self.order, self.cell_start = state
+
+    def Update(self, positions):
+        # Only re-sort when some entity actually moved into another cell
+        coords = self.CellCoords(positions[:, :2])
+        cells = coords[:, 1] * self.shape[0] + coords[:, 0]
+        if not np.array_equal(cells, self.cells):
+            self.Rebuild(positions)
+
+    def Query(self, centers, radius):
+        # Broad phase: every (query, entity) pair sharing a cell with the query's bounding box
+        centers = np.asarray(centers, dtype=np.float32).reshape(-1, 2)
+        lo = self.CellCoords(centers - radius)
+        hi = self.CellCoords(centers + radius)
+        span = hi - lo + 1
+
+        query_ids = []
+        entity_ids = []
+        for dy in range(int(span[:, 1].max(initial=0))):
+            for dx in range(int(span[:, 0].max(initial=0))):
+                queries = np.flatnonzero((dx < span[:, 0]) & (dy < span[:, 1]))
+                cells = (lo[queries, 1] + dy) * self.shape[0] + lo[queries, 0] + dx
+                starts = self.cell_start[cells]
+                counts = self.cell_start[cells + 1] - starts
+                total = int(counts.sum())
+                if total == 0:
+                    continue
+
+                # Expand each cell's [start, end) range into individual slots
+                run_starts = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+                query_ids.append(np.repeat(queries, counts))
+                entity_ids.append(self.order[run_starts + np.arange(total)])
+
+        if len(query_ids) == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+        return np.concatenate(query_ids), np.concatenate(entity_ids)
+
+    def InRect(self, lo, hi):
+        # Every entity in a cell overlapping the box [lo, hi]. Entities are sorted by cell and
+        # cells are numbered row by row, so each row of the box is one contiguous slice.
+        # Only ever one box, so plain Python arithmetic beats NumPy's per-call overhead here
+        width, height = int(self.shape[0]), int(self.shape[1])
+        (x0, y0), (x1, y1) = ((np.array([lo[:2], hi[:2]], dtype=np.float64) - self.world_min) // self.cell_size).astype(np.int64).tolist()
+        x0, x1 = min(max(x0, 0), width - 1), min(max(x1, 0), width - 1)
+        y0, y1 = min(max(y0, 0), height - 1), min(max(y1, 0), height - 1)
+        if x0 == 0 and y0 == 0 and x1 == width - 1 and y1 == height - 1:
+            return np.arange(len(self.order))  # The box covers the whole grid
+        cell_start = self.cell_start
+        return np.concatenate([self.order[cell_start[row + x0]:cell_start[row + x1 + 1]] for row in range(y0 * width, (y1 + 1) * width, width)])
+
+    def Overlaps(self, centers, positions, radius):
+        # Broad phase followed by a batched distance test against the entity positions
+        centers = np.asarray(centers, dtype=np.float32).reshape(-1, 2)
+        query_ids, entity_ids = self.Query(centers, radius)
+        delta = positions[entity_ids, :2] - centers[query_ids]
+        hit = np.einsum('ij,ij->i', delta, delta) < radius * radius
+        return query_ids[hit], entity_ids[hit]
@@ -0,0 +1,37 @@
+import numpy as np
+
+class FixedTimestep:
+    # Accumulates real frame time and hands it out as whole simulation ticks of a fixed length
+    def __init__(self, tick_rate=120, max_steps=8):
+        self.dt = 1.0 / tick_rate
+        self.max_steps = max_steps  # Most ticks run in one frame before we give up catching up
+        self.accumulator = 0.0
+        self.dropped_time = 0.0  # Time discarded by the spiral-of-death guard
+
+    def Reset(self):
+        self.accumulator = 0.0
+
+    def Advance(self, frame_time):
+        # Returns how many ticks to run this frame
+        self.accumulator += max(0.0, frame_time)
+        steps = int(self.accumulator // self.dt)
+
+        # Spiral of death: if we fell too far behind, run max_steps and drop the backlog
+        # instead of trying to catch up (which would make the next frame even longer)
+        if steps > self.max_steps:
+            self.dropped_time += (steps - self.max_steps) * self.dt
+            steps = self.max_steps
+            self.accumulator = self.accumulator % self.dt
+        else:
+            self.accumulator -= steps * self.dt
+        return steps
+
+    def Alpha(self):
+        # How far between the last two ticks the current frame is, in [0, 1)
+        return self.accumulator / self.dt
+
+def Interpolate(previous, current, alpha):
+    # Blend the previous and current tick for rendering. A changed entity count (new map) can't be blended.
+    if previous is None or np.shape(previous) != np.shape(current):
+        return current
+    return previous + (current - previous) * alpha
@@ -0,0 +1,76 @@
+import numpy as np
+
+def ModelMatrices(positions, rotations_z=None, scales=None):
+    # translation @ rotation_z @ scale for a whole batch of objects at once
+    positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+    count = len(positions)
+    rotations_z = np.zeros(count, dtype=np.float32) if rotations_z is None else np.broadcast_to(rotations_z, (count,))
+    scales = np.ones((count, 3), dtype=np.float32) if scales is None else np.broadcast_to(scales, (count, 3))
+
+    cos = np.cos(rotations_z)
+    sin = np.sin(rotations_z)
+    matrices = np.zeros((count, 4, 4), dtype=np.float32)
+    matrices[:, 0, 0] = cos * scales[:, 0]
+    matrices[:, 0, 1] = -sin * scales[:, 1]
+    matrices[:, 1, 0] = sin * scales[:, 0]
+    matrices[:, 1, 1] = cos * scales[:, 1]
+    matrices[:, 2, 2] = scales[:, 2]
+    matrices[:, :3, 3] = positions
+    matrices[:, 3, 3] = 1
+    return matrices
+
+class Transform:
+    # Position / rotation / scale whose model matrix is only rebuilt after one of them changes
+    def __init__(self, position, rotation_z, scale):
+        self._position = np.array(position, dtype=np.float32)
+        self._rotation_z = float(rotation_z)
+        self._scale = np.array(scale, dtype=np.float32)
+        self.matrix = np.identity(4, dtype=np.float32)
+        self.dirty = True
+
+    @property
+    def position(self):
+        return self._position
+    @position.setter
+    def position(self, value):
+        if not np.array_equal(value, self._position):
+            self._position = np.array(value, dtype=np.float32)
+            self.dirty = True
+
+    @property
+    def rotation_z(self):
+        return self._rotation_z
+    @rotation_z.setter
+    def rotation_z(self, value):
+        if value != self._rotation_z:
+            self._rotation_z = float(value)
+            self.dirty = True
+
+    @property
+    def scale(self):
+        return self._scale
+    @scale.setter
+    def scale(self, value):
+        if not np.array_equal(value, self._scale):
+            self._scale = np.array(value, dtype=np.float32)
+            self.dirty = True
+
+    def Matrix(self):
+        if self.dirty:
+            self.matrix = ModelMatrices(self._position, self._rotation_z, self._scale)[0]
+            self.dirty = False
+        return self.matrix
+
+def UpdateTransforms(transforms):
+    # Rebuild the matrices of every dirty transform with a single batched computation
+    dirty = [transform for transform in transforms if transform.dirty]
+    if len(dirty) == 0:
+        return
+    matrices = ModelMatrices(
+        [transform.position for transform in dirty],
+        np.array([transform.rotation_z for transform in dirty], dtype=np.float32),
+        [transform.scale for transform in dirty]
+    )
+    for transform, matrix in zip(dirty, matrices):
+        transform.matrix = matrix
+        transform.dirty = False
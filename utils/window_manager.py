@@ -2,6 +2,20 @@ import glfw
 from OpenGL.GL import *
 import imgui
 from imgui.integrations.glfw import GlfwRenderer
+from utils.inputs import InputState, KEY_1, KEY_2, KEY_W, KEY_A, KEY_S, KEY_D, KEY_SPACE, KEY_F, KEY_E
+
+# glfw key -> input bit
+KEY_BITS = {
+    glfw.KEY_1 : KEY_1,
+    glfw.KEY_2 : KEY_2,
+    glfw.KEY_W : KEY_W,
+    glfw.KEY_A : KEY_A,
+    glfw.KEY_S : KEY_S,
+    glfw.KEY_D : KEY_D,
+    glfw.KEY_SPACE : KEY_SPACE,
+    glfw.KEY_F : KEY_F,
+    glfw.KEY_E : KEY_E,
+}
 
 class Window:
     def __init__(self, height, width):
@@ -41,6 +55,17 @@ class Window:
         imgui.create_context()
         self.impl = GlfwRenderer(self.window)
 
+        # Keyboard state is kept up to date by key events instead of polling every key each frame.
+        # Installed after the imgui renderer, whose own key callback we pass events on to.
+        self.inputs = InputState()
+        glfw.set_key_callback(self.window, self.KeyCallback)
+
+    def KeyCallback(self, window, key, scancode, action, mods):
+        self.impl.keyboard_callback(window, key, scancode, action, mods)
+        bit = KEY_BITS.get(key)
+        if bit is not None and action != glfw.REPEAT:
+            self.inputs.KeyEvent(bit, action == glfw.PRESS)
+
     def Close(self):
         glfw.terminate()
     
@@ -54,27 +79,7 @@ class Window:
         time = {"currentTime" : currentTime, "deltaTime" : deltaTime}
 
         glfw.poll_events()
-        
-        inputs = []
-        if glfw.get_key(self.window, glfw.KEY_1) == glfw.PRESS:
-            inputs.append("1")
-        if glfw.get_key(self.window, glfw.KEY_2) == glfw.PRESS:
-            inputs.append("2")
-        if glfw.get_key(self.window, glfw.KEY_W) == glfw.PRESS:
-            inputs.append("W")
-        if glfw.get_key(self.window, glfw.KEY_A) == glfw.PRESS:
-            inputs.append("A")
-        if glfw.get_key(self.window, glfw.KEY_S) == glfw.PRESS:
-            inputs.append("S")
-        if glfw.get_key(self.window, glfw.KEY_D) == glfw.PRESS:
-            inputs.append("D")
-        if glfw.get_key(self.window, glfw.KEY_SPACE) == glfw.PRESS:
-            inputs.append("SPACE")
-        if glfw.get_key(self.window, glfw.KEY_F) == glfw.PRESS:
-            inputs.append("F")
-        if glfw.get_key(self.window, glfw.KEY_E) == glfw.PRESS:
-            inputs.append("E")
-
+        self.inputs.NextFrame()
 
         self.impl.process_inputs()
         imgui.new_frame()
@@ -82,7 +87,7 @@ class Window:
         glClearColor(c0, c1, c2, c3)
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
 
-        return inputs, time
+        return self.inputs, time
     
     def EndFrame(self):
         imgui.render()